@@ -14,6 +14,7 @@ class CleanEmailData(BaseModel):
     subject: Optional[str] = None
     message: Optional[str] = None
     time: str
+    crafted_email: Optional[str] = None
 
 # --------------------------
 # Class: GetBasicEmails
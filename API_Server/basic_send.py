@@ -1,6 +1,6 @@
-import requests
 from typing import Dict, Any
 from color import Agent 
+from Backend.core.webhook_client import get_webhook_client
 
 # --------------------------
 # Class: SendBasicEmail
@@ -9,7 +9,7 @@ class SendBasicEmail(Agent):
     def __init__(self):
         self.name = "BasicEmailSender"
         self.color = self.GREEN
-        self.webhook_url = "http://localhost:5678/webhook/b2a962e2-927f-40d9-8e60-ccf4241c3228"
+        self.webhook = "basic_reply"
 
     def send_email(self, email_id: str, crafted_message: str) -> Dict[str, Any]:
         """
@@ -25,7 +25,7 @@ class SendBasicEmail(Agent):
 
         try:
             self.log(f"Sending payload to n8n webhook...")
-            response = requests.post(self.webhook_url, json=payload, timeout=30)
+            response = get_webhook_client().post(self.webhook, payload)
             response.raise_for_status()
             result = response.json()
 
@@ -1,8 +1,14 @@
+import os
+import sys
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 
+# The senders use the Backend's shared webhook client (Backend.core.webhook_client).
+# Appended, not inserted, so this folder's own modules still come first.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 # Import all your email processing classes
 from basic_send import SendBasicEmail
 from basic_delete import DeleteBasicEmail
@@ -1,6 +1,7 @@
 import requests
 from typing import Dict, Any
 from color import Agent
+from Backend.core.webhook_client import get_webhook_client
 
 # --------------------------
 # Class: NonBusinessSendEmail
@@ -10,7 +11,7 @@ class NonBusinessSendEmail(Agent):
         self.name = "NonBusinessSendEmail"
         self.color = self.RED
         # Specific webhook for non-business emails
-        self.webhook_url = "http://localhost:5678/webhook/5ff54f86-9344-4dcf-b5f0-e1e6c637a5e6"
+        self.webhook = "nonbusiness_reply"
 
     def send_email(self, email_id: str, crafted_message: str) -> Dict[str, Any]:
         """
@@ -27,7 +28,7 @@ class NonBusinessSendEmail(Agent):
         # Send to n8n
         try:
             self.log("Sending payload to non-business n8n webhook...")
-            response = requests.post(self.webhook_url, json=payload, timeout=30)
+            response = get_webhook_client().post(self.webhook, payload)
             response.raise_for_status()
             
             try:
@@ -1,14 +1,13 @@
 import requests
+from Backend.core.webhook_client import get_webhook_client
 
 def send_to_n8n(data):
     """
     Sends a Python dictionary as JSON to the specified n8n webhook.
     Returns a clean dictionary with 'status' and 'emailId'.
     """
-    url = "http://localhost:5678/webhook/27dd1715-2450-4a71-886d-8f1070592870"
-   
     try:
-        response = requests.post(url, json=data, timeout=30)
+        response = get_webhook_client().post("priority_reply", data)
         response.raise_for_status()
         
         try:
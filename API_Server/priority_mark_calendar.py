@@ -1,4 +1,17 @@
+import os
 import requests
+from Backend.core.webhook_client import get_webhook_client
+
+# The Backend's calendar cache refetches events when this file's mtime changes
+CALENDAR_STAMP_PATH = r"D:\Projects\inbox-manager\databases\calendar_changed.stamp"
+
+
+def touch_calendar_stamp():
+    os.makedirs(os.path.dirname(CALENDAR_STAMP_PATH), exist_ok=True)
+    with open(CALENDAR_STAMP_PATH, "a"):
+        pass
+    os.utime(CALENDAR_STAMP_PATH, None)
+
 
 def mark_calendar(title, start, end):
     """
@@ -12,8 +25,6 @@ def mark_calendar(title, start, end):
     Returns:
         dict: {"status": <status>, "id": <id>}
     """
-    url = "http://localhost:5678/webhook/4bf897c5-dfe6-47b2-9d1d-49c7cd28e29d"
-    
     payload = {
         "title": title,
         "start": start,
@@ -21,8 +32,9 @@ def mark_calendar(title, start, end):
     }
     
     try:
-        response = requests.post(url, json=payload, timeout=10)
+        response = get_webhook_client().post("mark_calendar", payload)
         response.raise_for_status()
+        touch_calendar_stamp()
         
         data = response.json()
         
@@ -1,6 +1,6 @@
-import requests
 from typing import Dict, Any
 from color import Agent
+from Backend.core.webhook_client import get_webhook_client
 
 # --------------------------
 # Class: SchedulerSendEmail
@@ -10,7 +10,7 @@ class SchedulerSendEmail(Agent):
         self.name = "SchedulerSendEmail"
         self.color = self.BLUE
         # Specific webhook for scheduler emails
-        self.webhook_url = "http://localhost:5678/webhook/940d1ba2-2624-4de7-a320-18bd4fa525b4"
+        self.webhook = "scheduler_reply"
 
     def send_email(self, email_id: str, crafted_message: str) -> Dict[str, Any]:
         """
@@ -26,7 +26,7 @@ class SchedulerSendEmail(Agent):
 
         try:
             self.log("Sending payload to scheduler n8n webhook...")
-            response = requests.post(self.webhook_url, json=payload, timeout=30)
+            response = get_webhook_client().post(self.webhook, payload)
             response.raise_for_status()
             result = response.json()
 
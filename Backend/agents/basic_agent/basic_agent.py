@@ -1,12 +1,13 @@
 import os 
 from dotenv import load_dotenv
-from openai import OpenAI 
+from core.llm_cache import get_llm_client
 from agents.basic_agent.rag.answer import DB_NAME, AnswerQuestion
 from pydantic import BaseModel, Field
 from typing import Optional
 import sqlite3
-from agents.basic_agent.send_email import send_to_n8n
+from core.outbox import get_outbox
 from Backend.color import Agent
+from core.reply_renderer import ReplyContent, render_reply, request_reply
 import logging 
 
 logging.basicConfig(
@@ -25,7 +26,15 @@ AI Engineer.
 You will be provided with email content and the reply to the email sent to the user. You are responsible to take this information 
 and generate a concise and formal email response to the recipient.
 
-**CRITICAL: The body MUST be formatted as valid HTML suitable for email clients. Use inline CSS styles for formatting.**
+**Return only the text of the email as structured fields. Do NOT write HTML or markdown; the layout and signature are added
+automatically.**
+
+Fields:
+- greeting: the salutation, e.g. "Dear Sarah Johnson,"
+- paragraphs: the body paragraphs before any list
+- bullets: an optional list of points, each with an optional short bold title and its text; empty if not needed
+- closing_paragraphs: paragraphs after the list, e.g. an offer to discuss further; may be empty
+- sign_off: the closing phrase, e.g. "Best regards,"
 
 EXAMPLE:
 Email Content:
@@ -38,58 +47,17 @@ As an Applied AI Engineer, I have expertise in:
 - Agentic AI Systems (multi‑agent workflows, tool usage, automation)
 
 Final Email Response:
-
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-</head>
-<body style="margin: 0; padding: 0; font-family: Arial, sans-serif;">
-    <table role="presentation" style="width: 100%; border-collapse: collapse;">
-        <tr>
-            <td style="padding: 20px;">
-                <p style="margin: 0 0 15px 0; font-size: 16px; line-height: 1.6; color: #333333;">
-                    Dear Sarah Johnson,
-                </p>
-                
-                <p style="margin: 0 0 15px 0; font-size: 16px; line-height: 1.6; color: #333333;">
-                    Thank you for your message.
-                </p>
-                
-                <p style="margin: 0 0 15px 0; font-size: 16px; line-height: 1.6; color: #333333;">
-                    As an Applied AI Engineer, I specialize in designing and delivering end-to-end AI systems. My expertise includes:
-                </p>
-                
-                <ul style="margin: 0 0 15px 0; padding-left: 20px; font-size: 16px; line-height: 1.8; color: #333333;">
-                    <li style="margin-bottom: 8px;"><strong>Large Language Models</strong> (prompt engineering, evaluation, and integration)</li>
-                    <li style="margin-bottom: 8px;"><strong>Retrieval-Augmented Generation</strong> (knowledge-base design, embedding pipelines, and retrieval logic)</li>
-                    <li style="margin-bottom: 8px;"><strong>Agentic AI systems</strong> (multi-agent workflows, tool usage, and automation)</li>
-                </ul>
-                
-                <p style="margin: 0 0 15px 0; font-size: 16px; line-height: 1.6; color: #333333;">
-                    I would be happy to discuss how these capabilities can support your needs or explore potential collaboration.
-                </p>
-                
-                <p style="margin: 20px 0 0 0; font-size: 16px; line-height: 1.6; color: #333333;">
-                    Best regards,<br>
-                    <strong>Alee</strong>
-                </p>
-            </td>
-        </tr>
-    </table>
-</body>
-</html>
-
-HTML FORMATTING RULES:
-1. Always use table-based layouts for email compatibility
-2. Use inline CSS styles (no external stylesheets or <style> tags)
-3. Keep font sizes readable (14-16px for body text)
-4. Use proper spacing with margin and padding
-5. Structure content with <p>, <ul>, <li>, <strong>, <h3> tags as needed
-6. Maintain professional color scheme (#333333 for text, #2c3e50 for headings)
-7. Ensure proper line-height (1.6-1.8) for readability
-8. Always include DOCTYPE, html, head, and body tags
+greeting: "Dear Sarah Johnson,"
+paragraphs:
+  - "Thank you for your message."
+  - "As an Applied AI Engineer, I specialize in designing and delivering end-to-end AI systems. My expertise includes:"
+bullets:
+  - title: "Large Language Models", text: "(prompt engineering, evaluation, and integration)"
+  - title: "Retrieval-Augmented Generation", text: "(knowledge-base design, embedding pipelines, and retrieval logic)"
+  - title: "Agentic AI systems", text: "(multi-agent workflows, tool usage, and automation)"
+closing_paragraphs:
+  - "I would be happy to discuss how these capabilities can support your needs or explore potential collaboration."
+sign_off: "Best regards,"
 """
 
 
@@ -117,7 +85,7 @@ class BasicAgent(Agent):
     color = Agent.GREEN
     
     def __init__(self):
-        self.client = OpenAI(api_key=openrouter_api_key, base_url=openrouter_url)
+        self.client = get_llm_client()
         self.answer_question = AnswerQuestion()
         self.system_prompt = SYSTEM_PROMPT
         self.log("Initialized BasicAgent")
@@ -157,9 +125,10 @@ class BasicAgent(Agent):
         self.log(f"Email {email.email_id} inserted into database")
 
     def send_email(self, email, reply):
+        """Queue the reply; the executor's outbox dispatcher sends it to n8n."""
         data = {"id": email.email_id, "body": reply.body}
-        result = send_to_n8n(data)
-        self.log(f"EMAIL'S STATUS: {result['status']} EMAIL ID: {result['emailId']}")
+        if get_outbox().enqueue(email.email_id, "basic_reply", data, email=email.model_dump()):
+            self.log(f"Reply for email {email.email_id} queued for sending")
 
 
     def rag(self, email):
@@ -191,16 +160,8 @@ class BasicAgent(Agent):
         ]
     def generate_email_response(self, email) -> EmailResponse:
         self.log(f"Generating email response for {email.email_id}")
-        raw_response = self.client.chat.completions.create(
-            model=os.getenv("DEEPSEEK_MODEL"),
-            messages=self.make_messages(email)
-        )
-        content = raw_response.choices[0].message.content
-        try:
-            final_reply = EmailResponse.model_validate_json(content)
-        except Exception:
-        # Fallback: treat as raw HTML
-            final_reply = EmailResponse.model_validate({"body": content})
+        content = request_reply(self.client, os.getenv("DEEPSEEK_MODEL"), self.make_messages(email), ReplyContent)
+        final_reply = EmailResponse(body=render_reply(content))
         self.send_email(email, final_reply)
         return final_reply
 
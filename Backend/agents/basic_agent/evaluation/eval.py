@@ -5,8 +5,8 @@ from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 from typing import Tuple, List
 import json
-from evaluation.test import TestQuestion, load_tests
-from rag.answer import answer_question, fetch_context
+from agents.basic_agent.evaluation.test import TestQuestion, load_tests
+from agents.basic_agent.rag.answer import AnswerQuestion
 from openai import OpenAI 
 
 load_dotenv(override=True)
@@ -19,6 +19,22 @@ openrouter = OpenAI(base_url=openrouter_url, api_key=openrouter_api_key)
 MODEL = "gpt-oss-120b"
 db_name = "vector_db"
 
+# Retrieval setups compared by --compare: (label, hybrid, rewrite)
+RETRIEVAL_CONFIGS = [
+    ("dense + rewrite", False, True),
+    ("hybrid + rewrite", True, True),
+    ("hybrid, no rewrite", True, False),
+]
+
+_rag = None
+
+def get_rag() -> AnswerQuestion:
+    """The RAG pipeline as configured by the environment, shared by the evaluations."""
+    global _rag
+    if _rag is None:
+        _rag = AnswerQuestion()
+    return _rag
+
 class RetrievalEval(BaseModel):
     """Evaluation metrics for retrieval performance."""
 
@@ -82,19 +98,20 @@ def calculate_ndcg(keyword: str, retrieved_docs: list, k: int = 10) -> float:
     return dcg / idcg if idcg > 0 else 0.0
 
 
-def evaluate_retrieval(test: TestQuestion, k: int = 10) -> RetrievalEval:
+def evaluate_retrieval(test: TestQuestion, k: int = 10, rag: AnswerQuestion = None) -> RetrievalEval:
     """
     Evaluate retrieval performance for a test question.
 
     Args:
         test: TestQuestion object containing question and keywords
         k: Number of top documents to retrieve (default 10)
+        rag: AnswerQuestion to retrieve with (default: the shared one)
 
     Returns:
         RetrievalEval object with MRR, nDCG, and keyword coverage metrics
     """
     # Retrieve documents using shared answer module
-    retrieved_docs = fetch_context(test.question)
+    retrieved_docs = (rag or get_rag()).fetch_context(test.question)
     
     # Calculate MRR (average across all keywords)
     mrr_scores = [calculate_mrr(keyword, retrieved_docs) for keyword in test.keywords]
@@ -129,7 +146,7 @@ def evaluate_answer(test: TestQuestion) -> Tuple[AnswerEval, str, List]:
         Tuple of (AnswerEval object, generated_answer string, retrieved_docs list)
     """
     # Step 1: Get RAG response
-    generated_answer, retrieved_docs = answer_question(test.question)
+    generated_answer, retrieved_docs = get_rag().answer_question(test.question)
 
     # Step 2: LLM judge prompt (force strict JSON output)
     judge_messages = [
@@ -206,10 +223,23 @@ def evaluate_all_answers():
         progress = (index + 1) / total_tests
         yield test, result, progress
 
+def compare_retrieval():
+    """Average retrieval metrics over all tests for each setup in RETRIEVAL_CONFIGS."""
+    tests = load_tests()
+    print(f"{'setup':<20} {'MRR':>7} {'nDCG':>7} {'coverage':>9}")
+    for label, hybrid, rewrite in RETRIEVAL_CONFIGS:
+        rag = AnswerQuestion(hybrid=hybrid, rewrite=rewrite)
+        results = [evaluate_retrieval(test, rag=rag) for test in tests]
+        mrr = sum(r.mrr for r in results) / len(results)
+        ndcg = sum(r.ndcg for r in results) / len(results)
+        coverage = sum(r.keyword_coverage for r in results) / len(results)
+        print(f"{label:<20} {mrr:>7.4f} {ndcg:>7.4f} {coverage:>8.1f}%")
+
+
 def run_cli_evaluation(test_number: int):
     """Run evaluation for a specific test (async helper for CLI)."""
     # Load tests
-    tests = load_tests("tests.jsonl")
+    tests = load_tests()
 
     if test_number < 0 or test_number >= len(tests):
         print(f"Error: test_row_number must be between 0 and {len(tests) - 1}")
@@ -258,9 +288,13 @@ def run_cli_evaluation(test_number: int):
 def main():
     """CLI to evaluate a specific test by row number."""
     if len(sys.argv) != 2:
-        print("Usage: uv run eval.py <test_row_number>")
+        print("Usage: uv run eval.py <test_row_number> | --compare")
         sys.exit(1)
 
+    if sys.argv[1] == "--compare":
+        compare_retrieval()
+        return
+
     try:
         test_number = int(sys.argv[1])
     except ValueError:
@@ -1,17 +1,22 @@
 # ====================================== IMPORTING LIBRARIES =========================================
 from pathlib import Path
-from openai import OpenAI
+from core.llm_cache import get_llm_client
 from dotenv import load_dotenv
-from pydantic import BaseModel, Field
-from chromadb import PersistentClient
+from pydantic import BaseModel
 import os
-import re
 import logging
-from langchain_huggingface import HuggingFaceEmbeddings
-from sentence_transformers import SentenceTransformer
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from tenacity import retry, wait_exponential
-from litellm import completion, query
 from Backend.color import Agent
+from agents.basic_agent.rag.rerank import get_reranker, LLMReranker, Reranker
+from agents.basic_agent.rag.vector_index import VECTOR_BACKEND, ChromaIndex, NumpyIndex
+from agents.basic_agent.rag.bm25 import BM25_INDEX_PATH, BM25Index, reciprocal_rank_fusion
+from agents.basic_agent.rag.embedding_cache import EmbeddingCache, get_embedding_cache
+from agents.basic_agent.rag.embedder import EMBEDDING_BACKEND, EMBEDDING_MODEL, get_embedder
+from agents.basic_agent.rag.answer_cache import ANSWER_CACHE_ENABLED, SemanticAnswerCache, get_answer_cache, read_kb_version
 
 # Configure logging
 logging.basicConfig(
@@ -25,20 +30,78 @@ load_dotenv(override=True)
 openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
 openrouter_url = os.getenv("OPENROUTER_URL")
 
-openrouter = OpenAI(api_key=openrouter_api_key, base_url=openrouter_url)
-
 DB_NAME = r"D:\Projects\inbox-manager\databases\vector_db"
 KNOWLEDGE_BASE_PATH = Path("knowledge_base")
 
 collection_name = "docs"
-embedding_model = "all-MiniLM-L6-v2"
+embedding_model = EMBEDDING_MODEL
 
-chroma = PersistentClient(path=DB_NAME)
-collection = chroma.get_or_create_collection(collection_name)
 RETRIEVAL_K = 20
 FINAL_K = 10
 
-embeddings = SentenceTransformer(embedding_model)
+# Fuse BM25 keyword results with the dense results (RAG_HYBRID=0 for dense only)
+HYBRID_RETRIEVAL = os.getenv("RAG_HYBRID", "1") != "0"
+# LLM query rewrite before retrieval; hybrid retrieval usually makes it unnecessary
+REWRITE_QUERY = os.getenv("RAG_REWRITE", "1") != "0"
+
+# Chroma and the embedding model are heavy (torch, HNSW index on disk), so they
+# are only loaded the first time a question is actually answered.
+_collection = None
+_vector_index = None
+# kb_version the loaded index was built for; ingest bumps it after rewriting the index files
+_vector_index_version = None
+_bm25_index = None
+_bm25_index_version = None
+_load_lock = threading.Lock()
+_index_lock = threading.Lock()
+
+def get_collection():
+    """Open the Chroma collection on first use."""
+    global _collection
+    with _load_lock:
+        if _collection is None:
+            from chromadb import PersistentClient
+            chroma = PersistentClient(path=DB_NAME)
+            _collection = chroma.get_or_create_collection(collection_name)
+    return _collection
+
+def get_embeddings():
+    """Load the embedding model selected by RAG_EMBEDDING_BACKEND ("torch" or "onnx") on first use."""
+    return get_embedder()
+
+def get_vector_index(backend: str = VECTOR_BACKEND):
+    """
+    Open the retrieval index selected by RAG_VECTOR_BACKEND ("chroma" or "numpy").
+
+    The index is kept between questions and reopened once the knowledge base
+    has been re-ingested, i.e. when kb_version changes.
+    """
+    global _vector_index, _vector_index_version
+    version = read_kb_version()
+    with _index_lock:
+        if _vector_index is None or _vector_index.backend != backend or _vector_index_version != version:
+            if backend == "numpy":
+                _vector_index = NumpyIndex.load()
+            elif backend == "chroma":
+                _vector_index = ChromaIndex(get_collection())
+            else:
+                raise ValueError(f"Unknown vector backend: {backend}")
+            _vector_index_version = version
+        return _vector_index
+
+def get_bm25_index():
+    """
+    Load the BM25 index written at ingest time, or None if it has not been built yet.
+
+    Like the vector index, it is reloaded when kb_version changes.
+    """
+    global _bm25_index, _bm25_index_version
+    version = read_kb_version()
+    with _index_lock:
+        if (_bm25_index is None or _bm25_index_version != version) and os.path.exists(BM25_INDEX_PATH):
+            _bm25_index = BM25Index.load()
+            _bm25_index_version = version
+        return _bm25_index
 
 # this is a way that makes our code be retried after failing!
 wait = wait_exponential(multiplier=1, min=10, max=240)
@@ -46,13 +109,21 @@ wait = wait_exponential(multiplier=1, min=10, max=240)
 class Result(BaseModel):
     page_content: str
     metadata: dict
-# ========================================================================================
 
-# DEFINING DATA TEMPLATE FOR RANKING OF CHUNKS:
-class RankOrder(BaseModel):
-    order: list[int] = Field(
-        description="The order of relevance of chunks, from most relevant to least relevant, by chunk id number"
-    )
+class StageTimings(dict):
+    """Seconds spent in each stage of one answer_question call."""
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self[name] = self.get(name, 0.0) + time.perf_counter() - start
+
+    def summary(self):
+        return ", ".join(f"{name}={seconds:.2f}s" for name, seconds in self.items())
+# ========================================================================================
 
 # DEFINING SYSTEM PROMPT FOR THE ANSWER_QUESTION FUNCTION:
 SYSTEM_PROMPT = """
@@ -77,66 +148,61 @@ class AnswerQuestion(Agent):
     name = "RAG"
     color = Agent.CYAN
     
-    def __init__(self):
-        self.openrouter = openrouter
-        self.collection = collection
-        self.embeddings = embeddings
+    def __init__(self, reranker: Reranker = None, hybrid: bool = HYBRID_RETRIEVAL,
+                 rewrite: bool = REWRITE_QUERY, embedding_cache: EmbeddingCache = None,
+                 answer_cache: SemanticAnswerCache = None):
+        self.openrouter = get_llm_client()
+        self.reranker = reranker or get_reranker(self.openrouter)
+        self.embedding_cache = embedding_cache or get_embedding_cache()
+        # Questions asked with conversation history are never answered from the cache
+        self.answer_cache = answer_cache or (get_answer_cache() if ANSWER_CACHE_ENABLED else None)
+        self.hybrid = hybrid
+        self.rewrite = rewrite
         self.RETRIEVAL_K = RETRIEVAL_K
         self.FINAL_K = FINAL_K
         self.SYSTEM_PROMPT = SYSTEM_PROMPT
+        # Runs the original-query and rewritten-query retrievals side by side
+        self.retrieval_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rag-retrieval")
+        self.last_timings = StageTimings()
         self.log("Initialized AnswerQuestion RAG system")
-    
-    # DEFINING FUNCTION TO RANK THE CHUNKS:
-    #@retry(wait=wait)
-    def rerank(self, question, chunks):
-        self.log(f"Reranking {len(chunks)} chunks")
-        system_prompt = """
-You are a document re-ranker.
-You are provided with a question and a list of relevant chunks of text from a query of a knowledge
-base.
-The chunks are provided in the order they were retrieved; this should be approximately ordered by 
-relevance, but you may be able to improve on that.
-You must rank order the provided chunks by relevance to the question, with the most relevant chunk
-first.
-Reply only with the list of ranked chunk ids, nothing else. Include all the chunk ids you are 
-provided with, reranked.
-IMPORTANT: don't use commas between the numbers, just spaces 
-Good Example: "1 3 2 4 5"
-Bad Example: "1, 3, 2, 4, 5"
-"""
-
-        user_prompt = f"The user has asked the following question:\n\n{question}\n\nOrder all the chunks of text by relevance to the question, from most relevant to least relevant. Include all the chunk ids you are provided with, reranked.\n\n"
-        user_prompt += "Here are the chunks:\n\n"
-        for index, chunk in enumerate(chunks):
-            user_prompt += f"# CHUNK ID: {index + 1}:\n\n{chunk.page_content}\n\n"
-        user_prompt += "Reply only with the list of ranked chunk ids, nothing else."
-
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ]
-
-        response = self.openrouter.chat.completions.create(
-            model="gpt-oss-120b",
-            messages=messages,
-            temperature=0,
-            max_tokens=500
-        )
-
-        content = response.choices[0].message.content.strip()
 
-        # Remove any non-digit/space characters (in case the model adds extra text)
-        clean_content = re.findall(r'\d+', content)
-        order_list = [int(x) for x in clean_content]
+    @property
+    def collection(self):
+        return get_collection()
 
-        # Fallback: if model fails, keep original order
-        if not order_list:
-            order_list = list(range(1, len(chunks)+1))
+    @property
+    def index(self):
+        return get_vector_index()
 
-        # Validate using RankOrder
-        order = RankOrder(order=order_list).order
+    @property
+    def embeddings(self):
+        return get_embeddings()
+    
+    def embed_query(self, question):
+        """Encode a query, reusing the embedding of an identical earlier query."""
+        # Backends agree closely but not bit for bit, so they do not share cache entries
+        model_key = f"{embedding_model}:{EMBEDDING_BACKEND}"
+        return self.embedding_cache.encode(model_key, question, lambda text: self.embeddings.encode(text))
+
+    def log_cache_stats(self):
+        stats = self.embedding_cache.stats()
+        self.log(f"Query embedding cache: {stats['hits']} hits, {stats['misses']} misses "
+                 f"({stats['hit_rate']:.0%} hit rate, {stats['size']} entries)")
+        if self.answer_cache is not None:
+            stats = self.answer_cache.stats()
+            self.log(f"Answer cache: {stats['hits']} hits, {stats['misses']} misses "
+                     f"({stats['hit_rate']:.0%} hit rate, {stats['size']} entries)")
 
-        return [chunks[i - 1] for i in order]
+    # DEFINING FUNCTION TO RANK THE CHUNKS:
+    def rerank(self, question, chunks):
+        """Rerank with the configured reranker, falling back to the LLM if the local model fails."""
+        try:
+            return self.reranker.rerank(question, chunks)
+        except Exception as e:
+            if isinstance(self.reranker, LLMReranker):
+                raise
+            self.log(f"{self.reranker.name} failed, falling back to LLM rerank: {str(e)}")
+            return LLMReranker(self.openrouter).rerank(question, chunks)
 
     def merge_chunks(self, chunks, reranked):
         merged = chunks[:]
@@ -148,17 +214,17 @@ Bad Example: "1, 3, 2, 4, 5"
 
     # DEFINING FUNCTION THAT FETCH UNRANKED CHUNKS:
     def fetch_context_unranked(self, question):
-        query_embedding = self.embeddings.encode(question)
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=self.RETRIEVAL_K,
-            include=["documents", "metadatas", "distances"]
-        )
-        
-        docs = results.get("documents", [[]])[0]
-        metas = results.get("metadatas", [[]])[0]
-        
-        chunks = [Result(page_content=d, metadata=m) for d, m in zip(docs, metas)]
+        query_embedding = self.embed_query(question)
+        results = self.index.query(query_embedding, self.RETRIEVAL_K)
+
+        bm25 = get_bm25_index() if self.hybrid else None
+        if bm25 is not None:
+            keyword_results = bm25.query(question, self.RETRIEVAL_K)
+            results = reciprocal_rank_fusion([results, keyword_results])[:self.RETRIEVAL_K]
+        elif self.hybrid:
+            self.log("BM25 index not found, run ingest to build it; using dense retrieval only")
+
+        chunks = [Result(page_content=d, metadata=m) for d, m in results]
         
         if not chunks:
             self.log("No chunks retrieved from vector DB")
@@ -167,32 +233,44 @@ Bad Example: "1, 3, 2, 4, 5"
 
         return chunks
 
-    # MAKING FUNCTION THAT FETCHES CONTEXT AND RERANKS IT WITH FALLBACK
-    def fetch_context(self, original_question):
+    # MAKING FUNCTION THAT FETCHES CONTEXT AND RERANKS IT
+    def fetch_context(self, original_question, rewritten_question=None, timings=None):
         """
-        Fetch context with fallback mechanism:
-        1. Try with rewritten query
-        2. If no results, fallback to original query only
+        Retrieve and rerank context for a question:
+        1. Rewrite the question, unless the caller already did or rewriting is off
+        2. Retrieve with the original and rewritten queries concurrently
+        3. Rerank the merged chunks against the original question
+        Retrieval for an identical rewrite and reranking of a single chunk are
+        skipped, since they cannot change the result.
         """
-        rewritten_question = self.rewrite_query(original_question)
+        timings = timings if timings is not None else StageTimings()
+
+        if rewritten_question is None and not self.rewrite:
+            rewritten_question = original_question
+        elif rewritten_question is None:
+            with timings.stage("rewrite"):
+                rewritten_question = self.rewrite_query(original_question)
+
+        with timings.stage("retrieve"):
+            if rewritten_question.strip().lower() == original_question.strip().lower():
+                self.log("Rewritten query matches the original, retrieving once")
+                chunks = self.fetch_context_unranked(original_question)
+            else:
+                original_future = self.retrieval_pool.submit(self.fetch_context_unranked, original_question)
+                rewritten_future = self.retrieval_pool.submit(self.fetch_context_unranked, rewritten_question)
+                chunks = self.merge_chunks(original_future.result(), rewritten_future.result())
         
-        # First attempt: use both original and rewritten queries
-        chunks1 = self.fetch_context_unranked(original_question)
-        chunks2 = self.fetch_context_unranked(rewritten_question)
-        chunks = self.merge_chunks(chunks1, chunks2)
-        
-        # Fallback: if no chunks were retrieved, try with just original query
-        if not chunks:
-            self.log("No chunks found, trying fallback with original query only")
-            chunks = self.fetch_context_unranked(original_question)
-        
-        # If still no chunks, return empty list
         if not chunks:
-            self.log("No chunks retrieved after fallback")
+            self.log("No chunks retrieved")
             return []
         
+        if len(chunks) == 1:
+            self.log("Single chunk retrieved, skipping rerank")
+            return chunks
+
         # Rerank and return top K chunks
-        reranked = self.rerank(original_question, chunks)
+        with timings.stage("rerank"):
+            reranked = self.rerank(original_question, chunks)
         final_chunks = reranked[:self.FINAL_K]
         self.log(f"Returning top {len(final_chunks)} reranked chunks")
         return final_chunks
@@ -241,21 +319,44 @@ User's current question:
         Answer a question using RAG and return the answer and the retrieved context
         """
         self.log(f"Answering question: {question[:50]}...")
-        query = self.rewrite_query(question, history)
-        chunks = self.fetch_context(query)
+        timings = StageTimings()
+        self.last_timings = timings
+
+        use_answer_cache = self.answer_cache is not None and not history
+        if use_answer_cache:
+            with timings.stage("answer_cache"):
+                question_embedding = self.embed_query(question)
+                cached = self.answer_cache.lookup(question_embedding)
+            if cached is not None:
+                answer, chunks = cached
+                self.log(f"Answered from cache in {timings.summary()}")
+                return answer, [Result(**chunk) for chunk in chunks]
+
+        if self.rewrite:
+            with timings.stage("rewrite"):
+                query = self.rewrite_query(question, history)
+        else:
+            query = question
+        chunks = self.fetch_context(question, rewritten_question=query, timings=timings)
         
-        # Handle case where no chunks were retrieved even after fallback
+        # Handle case where no chunks were retrieved
         if not chunks:
             self.log("No relevant context found in knowledge base")
+            self.log(f"Stage timings: {timings.summary()}")
             return "I don't have that information in my knowledge base.", []
         
         messages = self.make_rag_messages(question, history, chunks)
-        response = self.openrouter.chat.completions.create(
-            model="gpt-oss-120b",
-            messages=messages,
-            temperature=0,
-            max_tokens=1000  
-        )
+        with timings.stage("generate"):
+            response = self.openrouter.chat.completions.create(
+                model="gpt-oss-120b",
+                messages=messages,
+                temperature=0,
+                max_tokens=1000  
+            )
         answer = response.choices[0].message.content.strip()
+        if use_answer_cache:
+            self.answer_cache.store(question, question_embedding, answer, [chunk.model_dump() for chunk in chunks])
         self.log("Successfully generated answer from RAG")
+        self.log(f"Stage timings: {timings.summary()}")
+        self.log_cache_stats()
         return answer, chunks
\ No newline at end of file
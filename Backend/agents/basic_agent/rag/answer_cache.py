@@ -0,0 +1,151 @@
+# ====================================== IMPORTING LIBRARIES =========================================
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import numpy as np
+
+# ==================================== SETTINGS =========================================
+ANSWER_CACHE_ENABLED = os.getenv("RAG_ANSWER_CACHE", "1") != "0"
+# Cosine similarity above which two questions count as the same question
+ANSWER_CACHE_THRESHOLD = float(os.getenv("RAG_ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_DB = r"D:\Projects\inbox-manager\databases\answer_cache.db"
+# Rewritten by ingest every time the knowledge base changes
+KB_VERSION_PATH = r"D:\Projects\inbox-manager\databases\kb_version.txt"
+
+
+def read_kb_version() -> str:
+    """Current knowledge-base version, or "" if the knowledge base was never ingested."""
+    try:
+        with open(KB_VERSION_PATH, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return ""
+
+
+def bump_kb_version() -> str:
+    """Give the knowledge base a new version; answers cached under the old one are dropped."""
+    version = uuid.uuid4().hex
+    os.makedirs(os.path.dirname(KB_VERSION_PATH), exist_ok=True)
+    with open(KB_VERSION_PATH, "w", encoding="utf-8") as f:
+        f.write(version)
+    return version
+
+
+def _normalize(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticAnswerCache:
+    """
+    Answers to earlier questions, looked up by question-embedding similarity.
+
+    Entries are stored in SQLite with the knowledge-base version they were
+    answered under and mirrored in memory as one normalized matrix, so a lookup
+    is a single matmul. When the version on disk changes, the old entries are
+    deleted.
+    """
+
+    def __init__(self, db_path: str = ANSWER_CACHE_DB, threshold: float = ANSWER_CACHE_THRESHOLD):
+        self.db_path = db_path
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.kb_version = None
+        self.matrix = None
+        self.rows = []
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.create_table()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def create_table(self):
+        conn = self._connect()
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS answer_cache (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kb_version TEXT NOT NULL,
+            question TEXT NOT NULL,
+            embedding BLOB NOT NULL,
+            answer TEXT NOT NULL,
+            chunks TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+        """)
+        conn.commit()
+        conn.close()
+
+    def _refresh(self):
+        """Reload the entries if the knowledge base was re-ingested since the last call."""
+        version = read_kb_version()
+        if version == self.kb_version:
+            return
+        conn = self._connect()
+        conn.execute("DELETE FROM answer_cache WHERE kb_version != ?", (version,))
+        conn.commit()
+        rows = conn.execute(
+            "SELECT embedding, answer, chunks FROM answer_cache WHERE kb_version = ? ORDER BY id",
+            (version,)
+        ).fetchall()
+        conn.close()
+        self.kb_version = version
+        self.rows = [(answer, json.loads(chunks)) for _, answer, chunks in rows]
+        vectors = [np.frombuffer(embedding, dtype=np.float32) for embedding, _, _ in rows]
+        self.matrix = np.vstack(vectors) if vectors else None
+
+    def lookup(self, embedding):
+        """Return (answer, chunks) of the most similar cached question above the threshold, or None."""
+        query = _normalize(embedding)
+        with self._lock:
+            self._refresh()
+            if self.matrix is not None:
+                scores = self.matrix @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self.hits += 1
+                    return self.rows[best]
+            self.misses += 1
+            return None
+
+    def store(self, question: str, embedding, answer: str, chunks: list[dict]):
+        vector = _normalize(embedding)
+        with self._lock:
+            self._refresh()
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO answer_cache (kb_version, question, embedding, answer, chunks, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.kb_version, question, vector.tobytes(), answer, json.dumps(chunks), time.time())
+            )
+            conn.commit()
+            conn.close()
+            self.rows.append((answer, chunks))
+            self.matrix = vector[None, :] if self.matrix is None else np.vstack([self.matrix, vector])
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self.rows),
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_answer_cache() -> SemanticAnswerCache:
+    """Return the process-wide answer cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SemanticAnswerCache()
+        return _cache
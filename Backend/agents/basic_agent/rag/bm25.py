@@ -0,0 +1,110 @@
+# ====================================== IMPORTING LIBRARIES =========================================
+import json
+import math
+import os
+import re
+from collections import Counter
+
+# ==================================== SETTINGS =========================================
+BM25_INDEX_PATH = r"D:\Projects\inbox-manager\databases\bm25_index.json"
+
+# Standard Okapi BM25 parameters
+K1 = 1.5
+B = 0.75
+
+# Constant from the reciprocal rank fusion paper; dampens the weight of the top ranks
+RRF_K = 60
+
+# Keeps prices ("$65", "$40.50") and names like "c++" or "c#" as single terms
+TOKEN_PATTERN = re.compile(r"\$?\d+(?:[.,]\d+)*|[a-z0-9]+(?:\+\+|#)?")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Okapi BM25 over the knowledge-base chunks, stored as an inverted index.
+
+    postings maps each term to [chunk position, term frequency] pairs, so a
+    query only touches the chunks that contain one of its terms.
+    """
+
+    def __init__(self, ids, documents, metadatas, postings, lengths):
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.postings = postings
+        self.lengths = lengths
+        self.avg_length = sum(lengths) / len(lengths) if lengths else 0.0
+        count = len(ids)
+        self.idf = {
+            term: math.log(1 + (count - len(postings_list) + 0.5) / (len(postings_list) + 0.5))
+            for term, postings_list in postings.items()
+        }
+
+    @classmethod
+    def build(cls, ids, documents, metadatas) -> "BM25Index":
+        postings = {}
+        lengths = []
+        for position, document in enumerate(documents):
+            terms = tokenize(document)
+            lengths.append(len(terms))
+            for term, frequency in Counter(terms).items():
+                postings.setdefault(term, []).append([position, frequency])
+        return cls(list(ids), list(documents), list(metadatas), postings, lengths)
+
+    @classmethod
+    def load(cls, path: str = BM25_INDEX_PATH) -> "BM25Index":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["ids"], data["documents"], data["metadatas"], data["postings"], data["lengths"])
+
+    def save(self, path: str = BM25_INDEX_PATH):
+        """Write the index next to path and move it into place, so a reader never sees half a file."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "ids": self.ids,
+                "documents": self.documents,
+                "metadatas": self.metadatas,
+                "postings": self.postings,
+                "lengths": self.lengths,
+            }, f)
+        os.replace(path + ".tmp", path)
+
+    def query(self, text: str, k: int):
+        """Return up to k (document, metadata) pairs with a positive score, best first."""
+        scores = {}
+        for term in set(tokenize(text)):
+            for position, frequency in self.postings.get(term, []):
+                norm = K1 * (1 - B + B * self.lengths[position] / self.avg_length)
+                score = self.idf[term] * frequency * (K1 + 1) / (frequency + norm)
+                scores[position] = scores.get(position, 0.0) + score
+        top = sorted(scores, key=scores.get, reverse=True)[:k]
+        return [(self.documents[i], self.metadatas[i]) for i in top]
+
+
+def reciprocal_rank_fusion(result_lists, k: int = RRF_K):
+    """
+    Merge ranked (document, metadata) lists by summing 1 / (k + rank) per document.
+
+    Only ranks are used, so dense cosine scores and BM25 scores never have to
+    be put on the same scale.
+    """
+    scores = {}
+    entries = {}
+    for results in result_lists:
+        for rank, (document, metadata) in enumerate(results, start=1):
+            scores[document] = scores.get(document, 0.0) + 1.0 / (k + rank)
+            entries.setdefault(document, (document, metadata))
+    return [entries[document] for document in sorted(scores, key=scores.get, reverse=True)]
+
+
+if __name__ == "__main__":
+    # Build the keyword index from the current Chroma collection, without re-ingesting
+    from agents.basic_agent.rag.answer import get_collection
+    data = get_collection().get(include=["documents", "metadatas"])
+    BM25Index.build(data["ids"], data["documents"], data["metadatas"]).save()
+    print(f"BM25 index written to {BM25_INDEX_PATH} ({len(data['ids'])} chunks)")
@@ -0,0 +1,98 @@
+# ====================================== IMPORTING LIBRARIES =========================================
+import os
+import re
+
+# ==================================== SETTINGS =========================================
+# Window and overlap are counted in whitespace-separated words, a close enough
+# stand-in for tokens at this chunk size and free to compute.
+CHUNK_TOKENS = int(os.getenv("RAG_CHUNK_TOKENS", "200"))
+CHUNK_OVERLAP = int(os.getenv("RAG_CHUNK_OVERLAP", "40"))
+
+HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+
+
+def split_sections(text):
+    """Split markdown into (heading path, paragraphs) sections, one per heading."""
+    sections = []
+    path = []
+    paragraphs = []
+    lines = []
+
+    def flush_paragraph():
+        if lines:
+            paragraphs.append("\n".join(lines).strip())
+            lines.clear()
+
+    def flush_section():
+        flush_paragraph()
+        if paragraphs:
+            sections.append((list(path), list(paragraphs)))
+            paragraphs.clear()
+
+    for line in text.splitlines():
+        match = HEADING.match(line)
+        if match:
+            flush_section()
+            level = len(match.group(1))
+            path[:] = path[:level - 1] + [match.group(2)]
+        elif line.strip():
+            lines.append(line.rstrip())
+        else:
+            flush_paragraph()
+    flush_section()
+    return sections
+
+
+def _pieces(paragraph, max_tokens, overlap):
+    """Split a paragraph longer than the window into overlapping word windows."""
+    words = paragraph.split()
+    if len(words) <= max_tokens:
+        return [paragraph]
+    step = max(1, max_tokens - overlap)
+    pieces = []
+    for start in range(0, len(words), step):
+        pieces.append(" ".join(words[start:start + max_tokens]))
+        if start + max_tokens >= len(words):
+            break
+    return pieces
+
+
+def window(paragraphs, max_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP):
+    """
+    Pack paragraphs into chunks of at most max_tokens words.
+
+    Each chunk after the first starts with the last overlap words of the
+    previous one when they fit in the window.
+    """
+    chunks = []
+    current = []
+    size = 0
+    for paragraph in paragraphs:
+        for piece in _pieces(paragraph, max_tokens, overlap):
+            count = len(piece.split())
+            if current and size + count > max_tokens:
+                chunks.append("\n\n".join(current))
+                tail = " ".join(" ".join(current).split()[-overlap:]) if overlap else ""
+                tail_size = len(tail.split())
+                current, size = ([tail], tail_size) if tail and tail_size + count <= max_tokens else ([], 0)
+            current.append(piece)
+            size += count
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def chunk_text(text, max_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP):
+    """
+    Deterministically chunk a markdown document.
+
+    Chunks never span two headings, and each is prefixed with its heading
+    path (e.g. "Pricing > Mentorship") so it stays searchable on its own.
+    Returns (headline, text) pairs in document order.
+    """
+    chunks = []
+    for path, paragraphs in split_sections(text):
+        heading = " > ".join(path)
+        for body in window(paragraphs, max_tokens, overlap):
+            chunks.append((path[-1] if path else "", f"{heading}\n\n{body}" if heading else body))
+    return chunks
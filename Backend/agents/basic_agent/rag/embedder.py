@@ -0,0 +1,133 @@
+# ====================================== IMPORTING LIBRARIES =========================================
+import os
+import threading
+import numpy as np
+
+# ==================================== SETTINGS =========================================
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# "torch" runs the SentenceTransformer, "onnx" the int8 export through onnxruntime (no torch import)
+EMBEDDING_BACKEND = os.getenv("RAG_EMBEDDING_BACKEND", "torch")
+ONNX_MODEL_DIR = r"D:\Projects\inbox-manager\databases\onnx_minilm"
+ONNX_MODEL_FILE = "model_int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+# all-MiniLM-L6-v2's max_seq_length
+MAX_SEQ_LENGTH = 256
+BATCH_SIZE = 32
+
+
+class TorchEmbedder:
+    """all-MiniLM-L6-v2 through sentence-transformers and PyTorch."""
+    backend = "torch"
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def encode(self, texts):
+        return self.model.encode(texts, batch_size=BATCH_SIZE, show_progress_bar=False)
+
+    def embed_documents(self, texts):
+        return self.encode(texts).tolist()
+
+
+class OnnxEmbedder:
+    """
+    all-MiniLM-L6-v2 exported to ONNX with dynamic int8 quantization.
+
+    Runs the transformer through onnxruntime and the fast tokenizer through
+    tokenizers, then applies the same mean pooling and L2 normalization as
+    the SentenceTransformer pipeline. Needs onnxruntime and tokenizers, and
+    a model exported with `python -m agents.basic_agent.rag.embedder export`.
+    """
+    backend = "onnx"
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, ONNX_MODEL_FILE),
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _encode_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        inputs = {name: value for name, value in inputs.items() if name in self.input_names}
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        mask = inputs["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def encode(self, texts):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        batches = [self._encode_batch(texts[i:i + BATCH_SIZE]) for i in range(0, len(texts), BATCH_SIZE)]
+        vectors = np.vstack(batches) if batches else np.zeros((0, 0), dtype=np.float32)
+        return vectors[0] if single else vectors
+
+    def embed_documents(self, texts):
+        return self.encode(texts).tolist()
+
+
+_embedders = {}
+_embedders_lock = threading.Lock()
+
+def get_embedder(backend: str = EMBEDDING_BACKEND):
+    """Load the embedder for a backend on first use and share it across the process."""
+    with _embedders_lock:
+        if backend not in _embedders:
+            if backend == "torch":
+                _embedders[backend] = TorchEmbedder()
+            elif backend == "onnx":
+                _embedders[backend] = OnnxEmbedder()
+            else:
+                raise ValueError(f"Unknown embedding backend: {backend}")
+        return _embedders[backend]
+
+
+def export_onnx(model_dir: str = ONNX_MODEL_DIR, model_name: str = EMBEDDING_MODEL):
+    """Export the SentenceTransformer's transformer to ONNX, quantize it to int8 and save the tokenizer."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(model_dir, exist_ok=True)
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+
+    sample = tokenizer(["An example sentence"], return_tensors="pt")
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    float_path = os.path.join(model_dir, "model.onnx")
+    dynamic = {"batch": 0, "sequence": 1}
+    torch.onnx.export(
+        transformer,
+        tuple(sample[name] for name in names),
+        float_path,
+        input_names=names,
+        output_names=["token_embeddings"],
+        dynamic_axes={name: dynamic for name in names + ["token_embeddings"]},
+        opset_version=17,
+    )
+    quantize_dynamic(float_path, os.path.join(model_dir, ONNX_MODEL_FILE), weight_type=QuantType.QInt8)
+    tokenizer.backend_tokenizer.save(os.path.join(model_dir, TOKENIZER_FILE))
+    print(f"ONNX int8 model written to {model_dir}")
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:] == ["export"]:
+        export_onnx()
+    else:
+        print("Usage: python -m agents.basic_agent.rag.embedder export")
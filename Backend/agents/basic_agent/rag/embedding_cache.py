@@ -0,0 +1,128 @@
+# ====================================== IMPORTING LIBRARIES =========================================
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+import numpy as np
+
+# ==================================== SETTINGS =========================================
+EMBEDDING_CACHE_SIZE = int(os.getenv("RAG_EMBEDDING_CACHE_SIZE", "1024"))
+# Keep query embeddings across restarts (RAG_EMBEDDING_CACHE_PERSIST=1)
+EMBEDDING_CACHE_PERSIST = os.getenv("RAG_EMBEDDING_CACHE_PERSIST", "0") == "1"
+EMBEDDING_CACHE_DB = r"D:\Projects\inbox-manager\databases\embedding_cache.db"
+
+
+def normalize_query(text: str) -> str:
+    """
+    Case- and whitespace-insensitive cache key.
+
+    all-MiniLM-L6-v2 uses an uncased tokenizer, so lowercasing does not
+    change the embedding.
+    """
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class EmbeddingCache:
+    """
+    Bounded LRU cache of query embeddings, keyed by model and normalized text.
+
+    With a db_path, embeddings are also written to SQLite and memory misses
+    are looked up there before encoding.
+    """
+
+    def __init__(self, max_entries: int = EMBEDDING_CACHE_SIZE, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if self.db_path:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self.create_table()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def create_table(self):
+        conn = self._connect()
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS query_embeddings (
+            key TEXT PRIMARY KEY,
+            vector BLOB NOT NULL,
+            created_at REAL NOT NULL
+        )
+        """)
+        conn.commit()
+        conn.close()
+
+    def _load(self, key: str):
+        conn = self._connect()
+        row = conn.execute("SELECT vector FROM query_embeddings WHERE key = ?", (key,)).fetchone()
+        conn.close()
+        return None if row is None else np.frombuffer(row[0], dtype=np.float32)
+
+    def _store(self, key: str, vector):
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO query_embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+            (key, vector.tobytes(), time.time())
+        )
+        conn.commit()
+        conn.close()
+
+    def _remember(self, key: str, vector):
+        with self._lock:
+            self.entries[key] = vector
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def encode(self, model_name: str, text: str, encode_fn):
+        """Return the embedding of text, calling encode_fn(text) only on a miss."""
+        key = f"{model_name}:{normalize_query(text)}"
+        with self._lock:
+            vector = self.entries.get(key)
+            if vector is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return vector
+
+        vector = self._load(key) if self.db_path else None
+        if vector is None:
+            vector = np.asarray(encode_fn(text), dtype=np.float32)
+            if self.db_path:
+                self._store(key, vector)
+            with self._lock:
+                self.misses += 1
+        else:
+            with self._lock:
+                self.hits += 1
+
+        self._remember(key, vector)
+        return vector
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self.entries),
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the process-wide query embedding cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache(db_path=EMBEDDING_CACHE_DB if EMBEDDING_CACHE_PERSIST else None)
+        return _cache
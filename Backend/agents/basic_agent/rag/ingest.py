@@ -4,14 +4,20 @@ from openai import OpenAI
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 from chromadb import PersistentClient
-from tqdm import tqdm
 import os
-from langchain_huggingface import HuggingFaceEmbeddings
 import json
 import re
+import hashlib
+import argparse
+from functools import partial
 from tenacity import retry, wait_exponential
 from litellm import completion
-from multiprocessing import Pool
+from agents.basic_agent.rag.vector_index import NumpyIndex
+from agents.basic_agent.rag.bm25 import BM25Index
+from agents.basic_agent.rag.answer_cache import bump_kb_version
+from agents.basic_agent.rag.chunker import chunk_text
+from agents.basic_agent.rag.ingest_pipeline import StreamingIngest, TokenBucket
+from agents.basic_agent.rag.embedder import EMBEDDING_MODEL, get_embedder
 
 # ==================================== CREDENTIALS =========================================
 load_dotenv(override=True)
@@ -20,11 +26,23 @@ MODEL = "openrouter/openai/gpt-oss-120b"
 
 DB_NAME = r"D:\Projects\inbox-manager\databases\vector_db"
 KNOWLEDGE_BASE_PATH = Path(r"D:\Projects\inbox-manager\Backend\agents\basic_agent\knowledge_base")
+# Content hash of every ingested file, so unchanged files are skipped next time
+MANIFEST_PATH = r"D:\Projects\inbox-manager\databases\ingest_manifest.json"
+# Headline/summary written by the LLM for local chunks, keyed by chunk text hash
+ENRICHMENT_CACHE_PATH = r"D:\Projects\inbox-manager\databases\enrichment_cache.json"
 AVERAGE_CHUNK_SIZE = 600
 
+# "llm" asks the model to split each document, "local" splits on markdown structure offline
+CHUNKER = os.getenv("RAG_CHUNKER", "llm")
+# With the local chunker, also let the LLM write a headline and summary per chunk
+ENRICH_CHUNKS = os.getenv("RAG_ENRICH_CHUNKS", "0") == "1"
+
 collection_name = "docs"
-embedding_model = "all-MiniLM-L6-v2"
+embedding_model = EMBEDDING_MODEL
 WORKERS = 4
+# Shared by every chunking/enrichment thread, so WORKERS can stay up without hitting rate limits
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("INGEST_LLM_RPM", "30"))
+llm_rate_limit = TokenBucket(rate=LLM_REQUESTS_PER_MINUTE / 60, capacity=WORKERS)
 wait = wait_exponential(multiplier=1, min=10, max=240)
 # ========================================================================================
                                     # STEP 1: CHUNKING
@@ -47,6 +65,13 @@ class Chunk(BaseModel):
 class Chunks(BaseModel):
     chunks: list[Chunk]
 
+class Enrichment(BaseModel):
+    headline: str = Field(description="A brief heading for this chunk, typically a few words, that is most likely to be surfaced in a query")
+    summary: str = Field(description="A few sentences summarizing the content of this chunk to answer common questions")
+
+def document_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
 # FETCHING DOCUMENTS:
 def fetch_documents():
     documents = []
@@ -54,7 +79,8 @@ def fetch_documents():
         doc_type = folder.name
         for file in folder.rglob("*.md"):
             with open(file, "r", encoding="utf-8") as f:
-                documents.append({"type": doc_type, "source": file.as_posix(), "text": f.read()})
+                text = f.read()
+            documents.append({"type": doc_type, "source": file.as_posix(), "text": text, "hash": document_hash(text)})
 
     print(f"Loaded {len(documents)} documents")
     return documents
@@ -99,49 +125,192 @@ def make_messages(document):
 
 @retry(wait=wait)
 def process_document(document):
+    llm_rate_limit.acquire()
     messages = make_messages(document)
     response = completion(model=MODEL, messages=messages, response_format=Chunks)
     reply = response.choices[0].message.content
     doc_as_chunks = Chunks.model_validate_json(reply).chunks
     return [chunk.as_result(document) for chunk in doc_as_chunks]
 
+# LOCAL CHUNKING, NO LLM CALLS:
+def local_chunks(document):
+    metadata = {"source": document["source"], "type": document["type"]}
+    return [Result(page_content=text, metadata=metadata) for _, text in chunk_text(document["text"])]
+
+# OPTIONAL LLM ENRICHMENT OF LOCAL CHUNKS:
+def chunk_hash(chunk):
+    return hashlib.sha256(chunk.page_content.encode("utf-8")).hexdigest()
+
+@retry(wait=wait)
+def enrich_chunk(chunk):
+    llm_rate_limit.acquire()
+    prompt = f"""
+You write a headline and a short summary for a chunk of a KnowledgeBase.
+The chunk is from the shared drive of an Applied AI Engineer, file: {chunk.metadata["source"]}
+
+IMPORTANT: Respond ONLY with valid JSON using this exact schema:
+{json.dumps(Enrichment.model_json_schema(), indent=2)}
+
+Here is the chunk:
+
+{chunk.page_content}
+"""
+    response = completion(model=MODEL, messages=[{"role": "user", "content": prompt}], response_format=Enrichment)
+    return Enrichment.model_validate_json(response.choices[0].message.content)
+
+def load_enrichment_cache():
+    if not os.path.exists(ENRICHMENT_CACHE_PATH):
+        return {}
+    with open(ENRICHMENT_CACHE_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_enrichment_cache(cache):
+    with open(ENRICHMENT_CACHE_PATH, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+
+def enrich_chunks(chunks, cache):
+    """Prefix chunks with an LLM headline and summary; only chunks whose text is not in the cache cost a call."""
+    enriched = []
+    for chunk in chunks:
+        key = chunk_hash(chunk)
+        if key not in cache:
+            cache[key] = enrich_chunk(chunk).model_dump()
+        enrichment = cache[key]
+        enriched.append(Result(
+            page_content=enrichment["headline"] + "\n\n" + enrichment["summary"] + "\n\n" + chunk.page_content,
+            metadata=chunk.metadata
+        ))
+    return enriched
+
 # FINALLY MAKE THE FUNCTION FOR CHUNKING
-def create_chunks(documents):
+def document_chunks(document, chunker=CHUNKER, enrichment_cache=None):
     """
-Create chunks using a number of workers in parallel.
-If you get a rate limit error, set the WORKERS to 1.
+Chunk one document with the LLM, or locally with chunker="local".
+Local chunks are enriched by the LLM when an enrichment_cache dict is given.
+Returns (chunk id, chunk) pairs.
 """
-    chunks = []
-    with Pool(processes=WORKERS) as pool:
-        for result in tqdm(pool.imap_unordered(process_document, documents), total=len
-    (documents)):
-            chunks.extend(result)
-    return chunks
+    if chunker == "local":
+        chunks = local_chunks(document)
+        if enrichment_cache is not None:
+            chunks = enrich_chunks(chunks, enrichment_cache)
+    elif chunker == "llm":
+        chunks = process_document(document)
+    else:
+        raise ValueError(f"Unknown chunker: {chunker}")
+    print(f"{len(chunks)} chunks from {document['source']}")
+    return list(zip(chunk_ids(chunks), chunks))
 
 
 # ========================================================================================
                                     # STEP 2: EMBEDDING
 # ========================================================================================
 
-hf_embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+def get_hf_embeddings():
+    """The embedder selected by RAG_EMBEDDING_BACKEND, the same one AnswerQuestion queries with."""
+    return get_embedder()
 
-def create_embeddings(chunks):
+def get_collection():
     chroma = PersistentClient(path=DB_NAME)
-    # Delete existing collection if exists
-    if collection_name in [c.name for c in chroma.list_collections()]:
-        chroma.delete_collection(collection_name)
-    # Extract texts
-    texts = [chunk.page_content for chunk in chunks]
-    # Generate embeddings using LangChain HuggingFace wrapper
-    vectors = hf_embeddings.embed_documents(texts)
-    # Create new collection
-    collection = chroma.get_or_create_collection(collection_name)
-    # Prepare IDs and metadata
-    ids = [str(i) for i in range(len(chunks))]
-    metas = [chunk.metadata for chunk in chunks]
-    # Add vectors to Chroma
-    collection.add(ids=ids, embeddings=vectors, documents=texts, metadatas=metas)
-    print(f"Vectorstore created with {collection.count()} documents")
+    return chroma.get_or_create_collection(collection_name)
+
+def chunk_ids(chunks):
+    """Stable ids from the source file and the chunk's position in it, e.g. ".../faq.md#3"."""
+    positions = {}
+    ids = []
+    for chunk in chunks:
+        source = chunk.metadata["source"]
+        position = positions.get(source, 0)
+        positions[source] = position + 1
+        ids.append(f"{source}#{position}")
+    return ids
+
+def upsert_chunks(collection, ids, vectors, texts, metadatas):
+    collection.upsert(ids=ids, embeddings=vectors, documents=texts, metadatas=metadatas)
+
+def rebuild_indexes(collection):
+    """Rebuild the numpy and BM25 indexes from the whole collection and bump the KB version."""
+    data = collection.get(include=["documents", "metadatas"])
+    # Same vectors for the in-process numpy backend (RAG_VECTOR_BACKEND=numpy)
+    NumpyIndex.export_collection(collection)
+    print("Numpy index created")
+    # Keyword index for hybrid retrieval
+    BM25Index.build(data["ids"], data["documents"], data["metadatas"]).save()
+    print("BM25 index created")
+    # Invalidates answers cached against the previous knowledge base
+    bump_kb_version()
+
+
+# ========================================================================================
+                                    # STEP 3: INCREMENTAL UPDATE
+# ========================================================================================
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(manifest):
+    os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+def plan_ingest(documents, manifest, chunker=CHUNKER):
+    """Return the documents that are new, changed or chunked differently since the manifest, and the sources that were deleted."""
+    changed = [
+        doc for doc in documents
+        if manifest.get(doc["source"]) != {"hash": doc["hash"], "chunker": chunker}
+    ]
+    current = {doc["source"] for doc in documents}
+    removed = [source for source in manifest if source not in current]
+    return changed, removed
+
+def ingest(full=False, chunker=CHUNKER, enrich=ENRICH_CHUNKS):
+    """Re-chunk and re-embed only the files that changed; full=True rebuilds the collection."""
+    documents = fetch_documents()
+    if full:
+        chroma = PersistentClient(path=DB_NAME)
+        if collection_name in [c.name for c in chroma.list_collections()]:
+            chroma.delete_collection(collection_name)
+        manifest = {}
+    else:
+        manifest = load_manifest()
+
+    # Switching chunker or enrichment re-chunks every file
+    mode = f"{chunker}+enrich" if chunker == "local" and enrich else chunker
+    changed, removed = plan_ingest(documents, manifest, mode)
+    if not changed and not removed:
+        print("Knowledge base is up to date")
+        return
+    print(f"{len(changed)} new or changed documents, {len(removed)} removed")
+
+    collection = get_collection()
+    for source in [doc["source"] for doc in changed] + removed:
+        collection.delete(where={"source": source})
+
+    # Chunking, embedding and upserting run as overlapping stages
+    enrichment_cache = load_enrichment_cache() if chunker == "local" and enrich else None
+    pipeline = StreamingIngest(
+        chunk_fn=partial(document_chunks, chunker=chunker, enrichment_cache=enrichment_cache),
+        embed_fn=get_hf_embeddings().embed_documents,
+        upsert_fn=partial(upsert_chunks, collection),
+        workers=WORKERS,
+    )
+    try:
+        count = pipeline.run(changed)
+    finally:
+        if enrichment_cache is not None:
+            save_enrichment_cache(enrichment_cache)
+    print(f"{count} Chunks embedded!")
+    rebuild_indexes(collection)
+
+    # Record the new state only after the collection has been updated
+    for source in removed:
+        manifest.pop(source)
+    for doc in changed:
+        manifest[doc["source"]] = {"hash": doc["hash"], "chunker": mode}
+    save_manifest(manifest)
+    print(f"Vectorstore holds {collection.count()} chunks")
 
 
 # =====================================================================================
@@ -149,12 +318,11 @@ def create_embeddings(chunks):
 # ====================================================================================
 
 if __name__ == "__main__":
-    # FETCHING AND CHUNKING DATA:
-    documents = fetch_documents()
-    print("documents.fetched")
-    chunks = create_chunks(documents)
-    print(f"{len(chunks)} Chunks made!")
-    # CREATE EMBEDDINGS AND VECTORSTORE
-    create_embeddings(chunks)
+    parser = argparse.ArgumentParser(description="Ingest the knowledge base into the vector store")
+    parser.add_argument("--full", action="store_true", help="rebuild from scratch instead of only changed files")
+    parser.add_argument("--chunker", choices=["llm", "local"], default=CHUNKER)
+    parser.add_argument("--enrich", action="store_true", default=ENRICH_CHUNKS,
+                        help="add LLM headlines and summaries to local chunks")
+    args = parser.parse_args()
+    ingest(full=args.full, chunker=args.chunker, enrich=args.enrich)
     print("INGESTION COMPLETED!!!")
-
@@ -0,0 +1,161 @@
+# ====================================== IMPORTING LIBRARIES =========================================
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# ==================================== SETTINGS =========================================
+EMBED_BATCH_SIZE = 32
+UPSERT_BATCH_SIZE = 256
+QUEUE_SIZE = 8
+# How long the embedding stage waits for more chunks before embedding a partial batch
+FLUSH_AFTER_SECONDS = 0.5
+
+_DONE = object()
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: acquire() blocks until a token is available.
+
+    Tokens refill at rate per second up to capacity, so bursts of up to
+    capacity calls go out at once and the long-run rate stays at rate.
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class StreamingIngest:
+    """
+    Three-stage ingest connected by bounded queues:
+    1. chunk_fn(document) -> [(id, chunk)] on a pool of I/O threads
+    2. embed_fn(texts) -> vectors on batches of chunks as they arrive
+    3. upsert_fn(ids, vectors, texts, metadatas) in batches
+    Chunking of later documents overlaps with embedding and upserting of
+    earlier ones, and the bounded queues keep a fast stage from running
+    far ahead of a slow one.
+    """
+
+    def __init__(self, chunk_fn, embed_fn, upsert_fn, workers: int = 4,
+                 embed_batch_size: int = EMBED_BATCH_SIZE, upsert_batch_size: int = UPSERT_BATCH_SIZE):
+        self.chunk_fn = chunk_fn
+        self.embed_fn = embed_fn
+        self.upsert_fn = upsert_fn
+        self.workers = workers
+        self.embed_batch_size = embed_batch_size
+        self.upsert_batch_size = upsert_batch_size
+        self.chunk_queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.vector_queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.errors = []
+        self.chunk_count = 0
+
+    def _fail(self, error):
+        self.errors.append(error)
+
+    def _chunk_stage(self, documents):
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingest-chunk") as pool:
+                futures = [pool.submit(self.chunk_fn, document) for document in documents]
+                for future in as_completed(futures):
+                    chunks = future.result()
+                    if chunks:
+                        self.chunk_queue.put(chunks)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self.chunk_queue.put(_DONE)
+
+    def _embed_batch(self, batch):
+        ids = [chunk_id for chunk_id, _ in batch]
+        texts = [chunk.page_content for _, chunk in batch]
+        metadatas = [chunk.metadata for _, chunk in batch]
+        self.vector_queue.put((ids, self.embed_fn(texts), texts, metadatas))
+
+    def _embed_stage(self):
+        batch = []
+        done = False
+        try:
+            while True:
+                try:
+                    item = self.chunk_queue.get(timeout=FLUSH_AFTER_SECONDS)
+                except queue.Empty:
+                    # Upstream is slow (LLM calls), embed what we have instead of idling
+                    if batch:
+                        self._embed_batch(batch)
+                        batch = []
+                    continue
+                if item is _DONE:
+                    done = True
+                    break
+                batch.extend(item)
+                while len(batch) >= self.embed_batch_size:
+                    self._embed_batch(batch[:self.embed_batch_size])
+                    batch = batch[self.embed_batch_size:]
+            if batch:
+                self._embed_batch(batch)
+        except Exception as e:
+            self._fail(e)
+            # Keep draining so the chunk stage never blocks on a full queue
+            while not done and self.chunk_queue.get() is not _DONE:
+                pass
+        finally:
+            self.vector_queue.put(_DONE)
+
+    def _upsert_stage(self):
+        pending = ([], [], [], [])
+
+        def flush():
+            if pending[0]:
+                self.upsert_fn(*pending)
+                self.chunk_count += len(pending[0])
+                for column in pending:
+                    column.clear()
+
+        done = False
+        try:
+            while True:
+                item = self.vector_queue.get()
+                if item is _DONE:
+                    done = True
+                    break
+                for column, values in zip(pending, item):
+                    column.extend(values)
+                if len(pending[0]) >= self.upsert_batch_size:
+                    flush()
+            flush()
+        except Exception as e:
+            self._fail(e)
+            while not done and self.vector_queue.get() is not _DONE:
+                pass
+
+    def run(self, documents) -> int:
+        """Ingest the documents and return the number of chunks upserted; re-raises the first stage error."""
+        stages = [
+            threading.Thread(target=self._chunk_stage, args=(documents,), name="ingest-chunker"),
+            threading.Thread(target=self._embed_stage, name="ingest-embedder"),
+            threading.Thread(target=self._upsert_stage, name="ingest-upserter"),
+        ]
+        for stage in stages:
+            stage.start()
+        for stage in stages:
+            stage.join()
+        if self.errors:
+            raise self.errors[0]
+        return self.chunk_count
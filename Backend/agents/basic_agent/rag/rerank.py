@@ -0,0 +1,128 @@
+# ====================================== IMPORTING LIBRARIES =========================================
+import abc
+import os
+import re
+import threading
+from pydantic import BaseModel, Field
+from Backend.color import Agent
+
+# ==================================== SETTINGS =========================================
+# Which reranker AnswerQuestion uses: "cross-encoder" (local, default) or "llm"
+RERANKER = os.getenv("RAG_RERANKER", "cross-encoder")
+CROSS_ENCODER_MODEL = os.getenv("RAG_CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+LLM_RERANK_MODEL = "gpt-oss-120b"
+
+# DEFINING DATA TEMPLATE FOR RANKING OF CHUNKS:
+class RankOrder(BaseModel):
+    order: list[int] = Field(
+        description="The order of relevance of chunks, from most relevant to least relevant, by chunk id number"
+    )
+
+RERANK_SYSTEM_PROMPT = """
+You are a document re-ranker.
+You are provided with a question and a list of relevant chunks of text from a query of a knowledge
+base.
+The chunks are provided in the order they were retrieved; this should be approximately ordered by
+relevance, but you may be able to improve on that.
+You must rank order the provided chunks by relevance to the question, with the most relevant chunk
+first.
+Reply only with the list of ranked chunk ids, nothing else. Include all the chunk ids you are
+provided with, reranked.
+IMPORTANT: don't use commas between the numbers, just spaces
+Good Example: "1 3 2 4 5"
+Bad Example: "1, 3, 2, 4, 5"
+"""
+
+
+class Reranker(Agent, abc.ABC):
+    """Orders retrieved chunks by relevance to a question, most relevant first."""
+    name = "Reranker"
+    color = Agent.CYAN
+
+    @abc.abstractmethod
+    def rerank(self, question, chunks):
+        """Return the chunks reordered by relevance to the question."""
+
+
+class LLMReranker(Reranker):
+    """Asks an LLM for the chunk order. Slow and token-hungry, kept as an option."""
+    name = "LLMReranker"
+
+    def __init__(self, client, model: str = LLM_RERANK_MODEL):
+        self.client = client
+        self.model = model
+
+    def rerank(self, question, chunks):
+        self.log(f"Reranking {len(chunks)} chunks with {self.model}")
+        user_prompt = f"The user has asked the following question:\n\n{question}\n\nOrder all the chunks of text by relevance to the question, from most relevant to least relevant. Include all the chunk ids you are provided with, reranked.\n\n"
+        user_prompt += "Here are the chunks:\n\n"
+        for index, chunk in enumerate(chunks):
+            user_prompt += f"# CHUNK ID: {index + 1}:\n\n{chunk.page_content}\n\n"
+        user_prompt += "Reply only with the list of ranked chunk ids, nothing else."
+
+        messages = [
+            {"role": "system", "content": RERANK_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt},
+        ]
+
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=0,
+            max_tokens=500
+        )
+
+        content = response.choices[0].message.content.strip()
+
+        # Remove any non-digit/space characters (in case the model adds extra text)
+        clean_content = re.findall(r'\d+', content)
+        order_list = []
+        for x in clean_content:
+            chunk_id = int(x)
+            if 1 <= chunk_id <= len(chunks) and chunk_id not in order_list:
+                order_list.append(chunk_id)
+
+        # Chunks the model left out keep their retrieval order at the end
+        order_list += [i for i in range(1, len(chunks) + 1) if i not in order_list]
+
+        # Validate using RankOrder
+        order = RankOrder(order=order_list).order
+
+        return [chunks[i - 1] for i in order]
+
+
+_cross_encoders = {}
+_cross_encoder_lock = threading.Lock()
+
+def get_cross_encoder(model_name: str = CROSS_ENCODER_MODEL):
+    """Load the CrossEncoder on first use and share it between rerankers."""
+    with _cross_encoder_lock:
+        if model_name not in _cross_encoders:
+            from sentence_transformers import CrossEncoder
+            _cross_encoders[model_name] = CrossEncoder(model_name, device="cpu")
+        return _cross_encoders[model_name]
+
+
+class CrossEncoderReranker(Reranker):
+    """Scores every (question, chunk) pair with a local cross-encoder in one batched forward pass."""
+    name = "CrossEncoderReranker"
+
+    def __init__(self, model_name: str = CROSS_ENCODER_MODEL):
+        self.model_name = model_name
+
+    def rerank(self, question, chunks):
+        self.log(f"Reranking {len(chunks)} chunks with {self.model_name}")
+        model = get_cross_encoder(self.model_name)
+        pairs = [(question, chunk.page_content) for chunk in chunks]
+        scores = model.predict(pairs, batch_size=len(pairs), show_progress_bar=False)
+        order = sorted(range(len(chunks)), key=lambda i: float(scores[i]), reverse=True)
+        return [chunks[i] for i in order]
+
+
+def get_reranker(client, name: str = RERANKER) -> Reranker:
+    """Build the reranker selected by name ("cross-encoder" or "llm")."""
+    if name == "llm":
+        return LLMReranker(client)
+    if name == "cross-encoder":
+        return CrossEncoderReranker()
+    raise ValueError(f"Unknown reranker: {name}")
@@ -0,0 +1,109 @@
+# ====================================== IMPORTING LIBRARIES =========================================
+import json
+import os
+import numpy as np
+
+# ==================================== SETTINGS =========================================
+# Retrieval backend used by AnswerQuestion: "chroma" (default) or "numpy"
+VECTOR_BACKEND = os.getenv("RAG_VECTOR_BACKEND", "chroma")
+NUMPY_INDEX_PATH = r"D:\Projects\inbox-manager\databases\numpy_index"
+
+EMBEDDINGS_FILE = "embeddings.npy"
+CHUNKS_FILE = "chunks.json"
+
+
+class ChromaIndex:
+    """Queries the Chroma collection (HNSW on disk)."""
+    backend = "chroma"
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def query(self, query_embedding, k):
+        """Return up to k (document, metadata) pairs, most similar first."""
+        results = self.collection.query(
+            query_embeddings=[query_embedding],
+            n_results=k,
+            include=["documents", "metadatas", "distances"]
+        )
+        docs = results.get("documents", [[]])[0]
+        metas = results.get("metadatas", [[]])[0]
+        return list(zip(docs, metas))
+
+
+class NumpyIndex:
+    """
+    Exact in-process nearest-neighbour search over a small corpus.
+
+    Chunk embeddings live in one contiguous, L2-normalized float32 matrix
+    read from a .npy file. A query is a single matmul for the cosine scores
+    plus argpartition for the top k. The matrix is read into memory rather
+    than memory-mapped, so no handle stays open and a re-ingest can replace
+    the files while the daemon is running (Windows cannot replace a mapped file).
+    """
+    backend = "numpy"
+
+    def __init__(self, embeddings, documents, metadatas, ids):
+        self.embeddings = embeddings
+        self.documents = documents
+        self.metadatas = metadatas
+        self.ids = ids
+
+    @classmethod
+    def load(cls, path: str = NUMPY_INDEX_PATH) -> "NumpyIndex":
+        embeddings = np.load(os.path.join(path, EMBEDDINGS_FILE))
+        with open(os.path.join(path, CHUNKS_FILE), "r", encoding="utf-8") as f:
+            chunks = json.load(f)
+        return cls(embeddings, chunks["documents"], chunks["metadatas"], chunks["ids"])
+
+    @staticmethod
+    def save(ids, embeddings, documents, metadatas, path: str = NUMPY_INDEX_PATH):
+        """
+        Write the index files; rows are normalized so a dot product is the cosine similarity.
+
+        Each file is written next to its target and moved into place with
+        os.replace, so a reader never sees a half-written file.
+        """
+        os.makedirs(path, exist_ok=True)
+        matrix = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+
+        embeddings_path = os.path.join(path, EMBEDDINGS_FILE)
+        with open(embeddings_path + ".tmp", "wb") as f:
+            np.save(f, matrix)
+        os.replace(embeddings_path + ".tmp", embeddings_path)
+
+        chunks_path = os.path.join(path, CHUNKS_FILE)
+        with open(chunks_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"ids": list(ids), "documents": list(documents), "metadatas": list(metadatas)}, f)
+        os.replace(chunks_path + ".tmp", chunks_path)
+
+    @classmethod
+    def export_collection(cls, collection, path: str = NUMPY_INDEX_PATH) -> "NumpyIndex":
+        """Copy every chunk of a Chroma collection into the numpy index files."""
+        data = collection.get(include=["embeddings", "documents", "metadatas"])
+        cls.save(data["ids"], data["embeddings"], data["documents"], data["metadatas"], path)
+        return cls.load(path)
+
+    def query(self, query_embedding, k):
+        """Return up to k (document, metadata) pairs, most similar first."""
+        if len(self.ids) == 0:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        scores = self.embeddings @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.documents[i], self.metadatas[i]) for i in top]
+
+
+if __name__ == "__main__":
+    # Export the current Chroma collection, e.g. after an ingest made before the numpy backend existed
+    from agents.basic_agent.rag.answer import get_collection
+    index = NumpyIndex.export_collection(get_collection())
+    print(f"Numpy index written to {NUMPY_INDEX_PATH} ({len(index.ids)} chunks)")
@@ -6,7 +6,8 @@ from typing import Optional
 from Backend.color import Agent
 import logging 
 from dotenv import load_dotenv
-from openai import OpenAI
+from core.llm_cache import get_llm_client
+from core.local_classifier import classify_locally, LOCAL_REASONING_PREFIX
 
 # --------------------------------------------------------------------------
 
@@ -75,7 +76,7 @@ class PriorityAgent(Agent):
     
     def __init__(self):
         self.system_prompt = SYSTEM_PROMPT
-        self.client = OpenAI(api_key=openrouter_api_key, base_url=openrouter_url)
+        self.client = get_llm_client()
         self.model = os.getenv("DEEPSEEK_MODEL")
 
     def user(self, email: CleanEmailData) -> str:
@@ -89,10 +90,32 @@ Message:
 {email.message}
 """
 
+    def local_classifier(self, email: CleanEmailData) -> Optional[Classification]:
+        """Classify with the local model, or return None when the LLM is needed."""
+        try:
+            local = classify_locally(email.subject, email.message, kind="PRIORITY")
+        except Exception as e:
+            self.log(f"Local classification failed, using LLM: {str(e)}")
+            return None
+        if local is None:
+            return None
+
+        label, confidence = local
+        self.log(f"Local classification: {label} (confidence: {confidence:.2f}), skipping LLM")
+        return Classification(
+            classification=label,
+            confidence=confidence,
+            reasoning=f"{LOCAL_REASONING_PREFIX} match on labelled examples"
+        )
+
     def classifier(self, email: CleanEmailData) -> Classification:
         """Classify the email using AI."""
         self.log(f"Starting priority classification for email_id={email.email_id}")
         self.log(f"Email subject: '{email.subject}' from {email.from_email}")
+
+        local = self.local_classifier(email)
+        if local is not None:
+            return local
         
         try:
             response = self.client.chat.completions.create(
@@ -170,12 +193,21 @@ Message:
         conn.close()
         self.log(f"Priority email {priority_email.email_id} successfully stored in database")
 
-    def run(self, email: CleanEmailData) -> Priority:
-        """Process the email, classify it by priority, and store it in the database."""
+    def run(self, email: CleanEmailData, classification: Optional[Classification] = None) -> Priority:
+        """
+        Process the email, classify it by priority, and store it in the database.
+
+        A classification precomputed by the executor's joint classifier is used
+        as is, skipping the classifier call.
+        """
         self.log(f"Processing priority email from {email.from_email}")
         
         # Classify the email
-        classification_result = self.classifier(email)
+        if classification is not None:
+            self.log(f"Using precomputed classification: {classification.classification}")
+            classification_result = classification
+        else:
+            classification_result = self.classifier(email)
         
         # Create Priority object with classification data
         priority_email = Priority(
@@ -0,0 +1,277 @@
+import logging
+import os
+import re
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+# --------------------------
+# Logging setup
+# --------------------------
+logger = logging.getLogger("Availability")
+
+# --------------------------
+# Availability settings
+# --------------------------
+# Appointment windows, as (start, end) times of day
+APPOINTMENT_WINDOWS = [(time(8, 0), time(10, 0)), (time(21, 0), time(23, 0))]
+# Appointments can be booked from tomorrow up to a month ahead
+HORIZON_DAYS = int(os.getenv("SCHEDULER_HORIZON_DAYS", "30"))
+# Earliest slots listed one per line; the rest of the horizon is summarized as date ranges,
+# so the prompt stays small however full the calendar is
+MAX_SLOTS = int(os.getenv("SCHEDULER_MAX_SLOTS", "10"))
+
+TIME_FORMATS = ["%H:%M", "%H:%M:%S", "%I:%M %p", "%I:%M%p", "%I:%M:%S %p", "%I:%M:%S%p", "%I %p"]
+
+
+def _parse_datetime(value: str) -> Optional[datetime]:
+    """Parse an ISO datetime, converting an aware one to local time."""
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def _parse_time(value: str) -> Optional[time]:
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), fmt).time()
+        except ValueError:
+            continue
+    return None
+
+
+def _moment(day: Optional[date], value) -> Optional[datetime]:
+    """An event boundary: a full ISO datetime, or a time of day on the event's date."""
+    if not isinstance(value, str) or not value.strip():
+        return None
+    if "T" in value or len(value) > 11:
+        return _parse_datetime(value)
+    clock = _parse_time(value)
+    if day is None or clock is None:
+        return None
+    return datetime.combine(day, clock)
+
+
+def parse_event(event: dict) -> Optional[tuple[datetime, datetime]]:
+    """
+    Busy interval of a calendar event, or None if it cannot be read.
+
+    Events come from n8n as {"date": "YYYY-MM-DD", "start_time", "end_time"};
+    "start"/"end" ISO datetimes are accepted too. An event on a known date
+    without readable times blocks that whole day, and one whose end is not
+    after its start is taken to run past midnight.
+    """
+    day = None
+    if isinstance(event.get("date"), str):
+        try:
+            day = date.fromisoformat(event["date"][:10])
+        except ValueError:
+            day = None
+
+    start = _moment(day, event.get("start_time") or event.get("start"))
+    end = _moment(day, event.get("end_time") or event.get("end"))
+
+    if start is None or end is None:
+        if day is None:
+            return None
+        return datetime.combine(day, time.min), datetime.combine(day + timedelta(days=1), time.min)
+    if end <= start:
+        end += timedelta(days=1)
+    return start, end
+
+
+def merge_intervals(intervals: list[tuple[datetime, datetime]]) -> list[tuple[datetime, datetime]]:
+    """Sort busy intervals and merge the ones that overlap or touch."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def busy_intervals(events: list) -> list[tuple[datetime, datetime]]:
+    """Merged busy intervals of the calendar events."""
+    if not isinstance(events, list):
+        # Treating an unexpected payload as an empty calendar would offer busy times
+        raise ValueError(f"Expected a list of calendar events, got {type(events).__name__}")
+    intervals = []
+    for event in events:
+        interval = parse_event(event) if isinstance(event, dict) else None
+        if interval is None:
+            logger.warning(f"Ignoring unreadable calendar event: {event}")
+            continue
+        intervals.append(interval)
+    return merge_intervals(intervals)
+
+
+def is_free(busy: list[tuple[datetime, datetime]], start: datetime, end: datetime) -> bool:
+    """True if no merged busy interval overlaps [start, end)."""
+    # Merged intervals are sorted by end as well, so only the first one ending after start can overlap
+    i = bisect_right(busy, start, key=lambda interval: interval[1])
+    return i == len(busy) or busy[i][0] >= end
+
+
+def free_windows(busy: list[tuple[datetime, datetime]], today: date,
+                 days: int = HORIZON_DAYS) -> list[tuple[datetime, datetime]]:
+    """
+    Every free appointment window from tomorrow through the horizon, earliest first.
+
+    A window counts as free only if no event overlaps any part of it.
+    """
+    slots = []
+    for offset in range(1, days + 1):
+        day = today + timedelta(days=offset)
+        for window_start, window_end in APPOINTMENT_WINDOWS:
+            start, end = datetime.combine(day, window_start), datetime.combine(day, window_end)
+            if is_free(busy, start, end):
+                slots.append((start, end))
+    return slots
+
+
+def _window_label(start: time, end: time) -> str:
+    return f"{start:%I:%M %p} - {end:%I:%M %p}"
+
+
+def _slot_line(start: datetime, end: datetime) -> str:
+    return f"- {start:%A}, {start:%B} {start.day}, {start:%Y}: {_window_label(start.time(), end.time())}"
+
+
+def _short_date(day: date) -> str:
+    return f"{day:%b} {day.day}"
+
+
+def _date_ranges(days: list[date]) -> str:
+    """Compress sorted dates into ranges, e.g. "Oct 25-Nov 2, Nov 4"."""
+    ranges = []
+    for day in days:
+        if ranges and day == ranges[-1][1] + timedelta(days=1):
+            ranges[-1][1] = day
+        else:
+            ranges.append([day, day])
+    return ", ".join(
+        _short_date(first) if first == last else f"{_short_date(first)}-{_short_date(last)}" for first, last in ranges
+    )
+
+
+def format_availability(slots: list[tuple[datetime, datetime]], today: date, days: int = HORIZON_DAYS,
+                        limit: int = MAX_SLOTS) -> str:
+    """
+    The earliest limit slots one per line, then the rest of the horizon per window as date ranges.
+
+    Every free window in the horizon appears, so a time missing from the
+    text really is unavailable.
+    """
+    if not slots:
+        return "No available slots."
+    lines = [_slot_line(start, end) for start, end in slots[:limit]]
+    later = slots[limit:]
+    if later:
+        last_day = today + timedelta(days=days)
+        lines.append(f"Also free, up to {last_day:%A}, {last_day:%B} {last_day.day}, {last_day:%Y}:")
+        for window_start, window_end in APPOINTMENT_WINDOWS:
+            free_days = [start.date() for start, _ in later if start.time() == window_start]
+            if free_days:
+                lines.append(f"- {_window_label(window_start, window_end)} on {_date_ranges(free_days)}")
+    return "\n".join(lines)
+
+
+# --------------------------
+# Requested time in the email
+# --------------------------
+MONTHS = ["january", "february", "march", "april", "may", "june", "july",
+          "august", "september", "october", "november", "december"]
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+# "may" is usually the verb, so only a capitalised May counts as the month
+MONTH_PATTERN = r"\b(" + "|".join([month for month in MONTHS if month != "may"] + [
+    "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sept", "sep", "oct", "nov", "dec", "(?-i:May)"
+]) + r")\b\.?"
+
+ISO_DATE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+MONTH_DAY = re.compile(MONTH_PATTERN + r"\s+(\d{1,2})(?:st|nd|rd|th)?(?:,?\s+(\d{4}))?\b", re.IGNORECASE)
+DAY_MONTH = re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?" + MONTH_PATTERN + r"(?:,?\s+(\d{4}))?", re.IGNORECASE)
+WEEKDAY = re.compile(r"\b(" + "|".join(WEEKDAYS) + r")\b", re.IGNORECASE)
+TOMORROW = re.compile(r"\btomorrow\b", re.IGNORECASE)
+CLOCK_12H = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*([ap])\.?m\.?(?![a-z])", re.IGNORECASE)
+CLOCK_24H = re.compile(r"\b([01]?\d|2[0-3]):([0-5]\d)\b")
+
+
+def _month_number(name: str) -> int:
+    return next(i for i, month in enumerate(MONTHS, 1) if month.startswith(name.lower()[:3]))
+
+
+def _calendar_date(year: Optional[str], month: int, day: int, today: date) -> Optional[date]:
+    """A date without a year is the next one on or after tomorrow."""
+    try:
+        if year:
+            return date(int(year), month, day)
+        candidate = date(today.year, month, day)
+        return candidate if candidate > today else date(today.year + 1, month, day)
+    except ValueError:
+        return None
+
+
+def requested_date(message: str, today: date) -> Optional[date]:
+    if match := ISO_DATE.search(message):
+        try:
+            return date(int(match[1]), int(match[2]), int(match[3]))
+        except ValueError:
+            return None
+    if match := MONTH_DAY.search(message):
+        return _calendar_date(match[3], _month_number(match[1]), int(match[2]), today)
+    if match := DAY_MONTH.search(message):
+        return _calendar_date(match[3], _month_number(match[2]), int(match[1]), today)
+    if TOMORROW.search(message):
+        return today + timedelta(days=1)
+    if match := WEEKDAY.search(message):
+        ahead = (WEEKDAYS.index(match[1].lower()) - today.weekday()) % 7 or 7
+        return today + timedelta(days=ahead)
+    return None
+
+
+def requested_time(message: str) -> Optional[time]:
+    if match := CLOCK_12H.search(message):
+        hour, minute = int(match[1]), int(match[2] or 0)
+        if not 1 <= hour <= 12 or minute > 59:
+            return None
+        return time(hour % 12 + (12 if match[3].lower() == "p" else 0), minute)
+    if match := CLOCK_24H.search(message):
+        return time(int(match[1]), int(match[2]))
+    return None
+
+
+def check_request(message: str, busy: list[tuple[datetime, datetime]], today: date,
+                  days: int = HORIZON_DAYS) -> Optional[str]:
+    """
+    One line saying whether the date and time the email asks for can be booked, or None if it names no date.
+
+    Only the first date and time in the email are considered.
+    """
+    day = requested_date(message, today)
+    if day is None:
+        return None
+    clock = requested_time(message)
+    asked = f"{day:%A}, {day:%B} {day.day}, {day:%Y}" + (f" at {clock:%I:%M %p}" if clock else "")
+
+    if day <= today:
+        return f"Requested {asked}: invalid, appointments start tomorrow."
+    if day > today + timedelta(days=days):
+        return f"Requested {asked}: beyond the booking horizon of {days} days."
+
+    windows = [(datetime.combine(day, start), datetime.combine(day, end)) for start, end in APPOINTMENT_WINDOWS]
+    if clock is not None:
+        windows = [(start, end) for start, end in windows if start.time() <= clock < end.time()]
+        if not windows:
+            return f"Requested {asked}: outside the appointment windows."
+    free = [(start, end) for start, end in windows if is_free(busy, start, end)]
+    if not free:
+        return f"Requested {asked}: unavailable."
+    return f"Requested {asked}: available as " + " or ".join(
+        _window_label(start.time(), end.time()) for start, end in free
+    ) + "."
@@ -1,7 +1,101 @@
-import requests
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional
 
-def read_calendar_events():
-    url = "http://localhost:5678/webhook/a02479d5-bb46-40ab-9b03-7ebbd47f8a0d"
-    response = requests.get(url)
+from core.webhook_client import get_webhook_client
+
+# --------------------------
+# Logging setup
+# --------------------------
+logger = logging.getLogger("CalendarCache")
+
+# --------------------------
+# Calendar cache settings
+# --------------------------
+CALENDAR_CACHE_TTL = float(os.getenv("CALENDAR_CACHE_TTL", "120"))
+# Touched by mark_calendar in the API server whenever it creates an event
+CALENDAR_STAMP_PATH = r"D:\Projects\inbox-manager\databases\calendar_changed.stamp"
+
+
+def fetch_calendar_events():
+    response = get_webhook_client().get("calendar_events")
+    response.raise_for_status()
     data = response.json()
-    return data['calendar_events']
\ No newline at end of file
+    return data['calendar_events']
+
+
+class CalendarCache:
+    """
+    Short-lived, process-wide cache of the calendar events.
+
+    Events are refetched once the TTL has passed, or as soon as the stamp
+    file's mtime changes, i.e. after the API server has created an event.
+    Fetches are single-flight: concurrent scheduler jobs that find the cache
+    stale wait for the one fetch in progress instead of starting their own.
+    Failed fetches are not cached.
+    """
+
+    def __init__(self, fetch_fn: Callable[[], list] = fetch_calendar_events, ttl: float = CALENDAR_CACHE_TTL,
+                 stamp_path: str = CALENDAR_STAMP_PATH):
+        self.fetch_fn = fetch_fn
+        self.ttl = ttl
+        self.stamp_path = stamp_path
+        self.events = None
+        self.fetched_at = 0.0
+        self.stamp = None
+        self.reads = 0
+        self.fetches = 0
+        self._lock = threading.Lock()
+
+    def _read_stamp(self) -> Optional[int]:
+        try:
+            return os.stat(self.stamp_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _is_fresh(self, stamp: Optional[int]) -> bool:
+        return (
+            self.events is not None
+            and time.monotonic() - self.fetched_at < self.ttl
+            and stamp == self.stamp
+        )
+
+    def get(self) -> list:
+        with self._lock:
+            self.reads += 1
+            stamp = self._read_stamp()
+            if not self._is_fresh(stamp):
+                if self.events is not None and stamp != self.stamp:
+                    logger.info("Calendar changed, refetching events")
+                self.events = self.fetch_fn()
+                self.fetched_at = time.monotonic()
+                self.stamp = stamp
+                self.fetches += 1
+            return self.events
+
+    def invalidate(self):
+        with self._lock:
+            self.events = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"reads": self.reads, "fetches": self.fetches}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_calendar_cache() -> CalendarCache:
+    """Return the process-wide calendar cache shared by every scheduler job."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CalendarCache()
+        return _cache
+
+
+def read_calendar_events():
+    return get_calendar_cache().get()
@@ -1,14 +1,16 @@
 from agents.scheduler_agent.read_calendar import read_calendar_events
+from agents.scheduler_agent.availability import busy_intervals, check_request, format_availability, free_windows
 from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import date
 import os 
 from dotenv import load_dotenv
-from openai import OpenAI
-from agents.scheduler_agent.send_email import send_to_n8n
+from core.llm_cache import bypass_llm_cache, get_llm_client
+from core.outbox import get_outbox
 import sqlite3
 import logging
 from Backend.color import Agent
+from core.reply_renderer import AppointmentReply, render_reply, request_reply
 
 # Configure logging
 logging.basicConfig(
@@ -36,7 +38,9 @@ SYSTEM_PROMPT = """
 You are a Scheduler Agent that proposes appointment availability via email on behalf of Alee, an Applied AI Engineer.
 
 You receive:
-- Calendar events with date (YYYY-MM-DD), start_time, and end_time.
+- The available appointment slots up to a month ahead, already checked against the calendar:
+  the earliest ones listed one by one, then the later free dates of each window as ranges.
+- A check of the date and time the recipient asked for, if they named one.
 - Recipient name and email.
 - Today's date.
 - (Optional) The recipient's requested or expected appointment time.
@@ -48,30 +52,30 @@ beneficial, you must schedule the earliest available time.
 
 RULES (STRICT):
 
-1. Allowed appointment windows ONLY:
-   - 08:00–10:00
-   - 21:00–23:00
+1. Allowed slots ONLY:
+   - Propose only a slot from the available slots, with exactly its date and time window.
+   - Never invent, shorten or shift a slot.
 
 2. Allowed dates:
    - Appointments can be scheduled starting from TOMORROW ONLY.
-   - Appointments may be scheduled on any day within the following month.
    - You must clearly emphasize that appointments cannot be scheduled earlier than tomorrow.
 
 3. Availability:
-   - A window is unavailable if any event overlaps it
-     (event_start < window_end AND event_end > window_start).
-   - Skip dates where both windows are unavailable.
+   - Every listed slot and every date in the listed ranges is free for that window;
+     any other date or time is unavailable.
 
 4. Slot selection (CRITICAL):
    - Choose ONLY ONE slot.
-   - It must be the earliest upcoming valid slot.
+   - It must be the earliest listed slot.
    - NEVER list multiple dates or times.
    - NEVER offer alternatives or options.
 
 5. Recipient expectation handling:
+   - If the requested time check says the requested time is available, propose that window
+     instead of the earliest slot, without apologizing.
    - If the recipient expects or requests a time that is unavailable or invalid,
      you must briefly apologize.
-   - After apologizing, propose the nearest EARLIER valid available slot
+   - After apologizing, propose the nearest EARLIER listed slot
      (never a later one).
    - Do not mention unavailability details or internal reasoning.
 
@@ -80,78 +84,32 @@ RULES (STRICT):
    - Ask for confirmation of that exact slot.
    - Be polite and professional.
    - Do not mention rules or analysis.
-   - End the email by mentioning ONLY:
-     - Sender name: Alee
-     - Position: Applied AI Engineer
-
-7. HTML Formatting (REQUIRED):
-   - Write the ENTIRE email in well-formatted HTML.
-   - Use a clean, professional design with proper styling.
-   - Highlight the appointment date and time prominently using a styled box or card.
-   - Use appropriate colors: subtle backgrounds, professional text colors.
-   - Ensure the email is responsive and looks good on all devices.
-   - Include proper spacing and typography.
+   - Do not write a signature; "Alee, Applied AI Engineer" is added automatically.
+
+7. Output format (REQUIRED):
+   - Return only the text of the email as structured fields. Do NOT write HTML or markdown;
+     the layout, the appointment card and the signature are added automatically.
+   - greeting: the salutation, e.g. "Dear Sarah Johnson,"
+   - paragraphs: the message before the proposed slot
+   - bullets: normally empty
+   - appointment: the single proposed slot, as date (e.g. "January 15, 2026") and
+     time (e.g. "08:00 AM - 10:00 AM")
+   - closing_paragraphs: the request for confirmation of that exact slot
+   - sign_off: the closing phrase, e.g. "Best regards,"
 
 8. No availability:
-   - If no valid slot exists, send a polite HTML-formatted email stating that no appointments
-     can be scheduled at this time and availability will be shared later.
+   - If the slots say there are no available slots, set appointment to null and write a polite email stating that no
+     appointments can be scheduled at this time and availability will be shared later.
 
 Any output containing multiple appointment options or flexible wording is INVALID.
-
-EXAMPLE HTML EMAIL FORMAT:
-
-<!DOCTYPE html>
-<html>
-<head>
-    <style>
-        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
-        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
-        .header { margin-bottom: 20px; }
-        .appointment-box { 
-            background: #f0f8ff; 
-            border-left: 4px solid #4a90e2; 
-            padding: 15px; 
-            margin: 20px 0; 
-            border-radius: 5px; 
-        }
-        .date { font-size: 18px; font-weight: bold; color: #4a90e2; }
-        .time { font-size: 16px; color: #555; margin-top: 5px; }
-        .footer { margin-top: 30px; padding-top: 20px; border-top: 1px solid #ddd; }
-        .signature { color: #666; font-size: 14px; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <p>Dear [Recipient Name],</p>
-        </div>
-        
-        <p>[Your message content here]</p>
-        
-        <div class="appointment-box">
-            <div class="date">📅 January 15, 2026</div>
-            <div class="time">🕐 08:00 AM - 10:00 AM</div>
-        </div>
-        
-        <p>[Request for confirmation]</p>
-        
-        <div class="footer">
-            <p>Best regards,</p>
-            <div class="signature">
-                <strong>Alee</strong><br>
-                Applied AI Engineer
-            </div>
-        </div>
-    </div>
-</body>
-</html>
-
-Follow this structure and styling approach for all emails you generate.
 """
 
 USER_PROMPT = """ 
-Here are the lists of calendar events:
-{calendar_events}
+Here are the available appointment slots:
+{available_slots}
+
+Requested time check:
+{requested_slot}
 
 Here are the recipient details:
 
@@ -169,11 +127,11 @@ class SchedulerAgent(Agent):
     color = Agent.BLUE
     
     def __init__(self):
-        self.client = OpenAI(api_key=openrouter_api_key, base_url=openrouter_url)
+        self.client = get_llm_client()
         self.system_prompt = SYSTEM_PROMPT
         self.user_prompt = USER_PROMPT
-        self.response_format = Email
-        self.send_email = send_to_n8n
+        self.response_format = AppointmentReply
+        self.outbox = get_outbox()
         self.log("Initialized SchedulerAgent")
 
     def insert_email(self, email: CleanEmailData):
@@ -214,13 +172,20 @@ class SchedulerAgent(Agent):
         return events
 
     def make_messages(self, email, events):
+        # Availability is worked out locally; the model only sees the free slots
+        today = date.today()
+        busy = busy_intervals(events)
+        slots = free_windows(busy, today)
+        self.log(f"Found {len(slots)} available slot(s)")
+        requested = check_request(email.message, busy, today) or "The recipient did not name a date."
         messages = [
             {"role": "system", "content": self.system_prompt},
             {"role": "user", "content": self.user_prompt.format(
-                calendar_events=events,
+                available_slots=format_availability(slots, today),
+                requested_slot=requested,
                 from_name=email.from_name,
                 from_email=email.from_email,
-                today_date=date.today(),
+                today_date=today,
                 message=email.message
             )},
         ]
@@ -229,17 +194,14 @@ class SchedulerAgent(Agent):
     def generate_email(self, email: CleanEmailData) -> Email:
         self.log(f"Generating appointment email for {email.from_email}")
         events = self.get_events()
-        response = self.client.chat.completions.parse(
-            model="gpt-oss-120b",
-            messages=self.make_messages(email, events),
-            response_format=self.response_format
-        )
-        parsed_email = response.choices[0].message.parsed
-        result = self.send_email({
+        content = request_reply(self.client, "gpt-oss-120b", self.make_messages(email, events), self.response_format)
+        parsed_email = Email(body=render_reply(content))
+        # Queued rather than sent, so the retry in run() never sends a second reply
+        if self.outbox.enqueue(email.email_id, "scheduler_reply", {
             "id": email.email_id,
             "body": parsed_email.body
-        })
-        self.log(f"EMAIL STATUS: {result['status']}, EMAIL ID: {result['emailId']}")
+        }, email=email.model_dump()):
+            self.log(f"Reply for email {email.email_id} queued for sending")
         return parsed_email
 
     def run(self, email: CleanEmailData) -> Email:
@@ -257,7 +219,9 @@ class SchedulerAgent(Agent):
             # Second attempt
             try:
                 self.log("Attempt 2: Retrying email generation")
-                email_response = self.generate_email(email)
+                # Ask the model again rather than replaying the cached answer that just failed
+                with bypass_llm_cache():
+                    email_response = self.generate_email(email)
                 self.log(f"Successfully processed scheduler request for {email.email_id} on second attempt")
                 return email_response
             except Exception as e2:
@@ -1,14 +1,13 @@
 import requests
+from core.webhook_client import get_webhook_client
 
 def send_to_n8n(data):
     """
     Sends a Python dictionary as JSON to the specified n8n webhook.
     Returns a clean dictionary with 'status' and 'emailId'.
     """
-    url = "http://localhost:5678/webhook/940d1ba2-2624-4de7-a320-18bd4fa525b4"
-    
     try:
-        response = requests.post(url, json=data, timeout=10)
+        response = get_webhook_client().post("scheduler_reply", data)
         response.raise_for_status()
         
         try:
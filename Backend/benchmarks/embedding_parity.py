@@ -0,0 +1,83 @@
+"""
+Parity and speed check of the ONNX int8 embedder against the torch one.
+
+Embeds the eval questions and the locally chunked knowledge base with both
+backends. Reports per-text cosine similarity between them, how much of the
+torch top-k retrieval the ONNX embeddings reproduce, and encode latency.
+Exits with status 1 if any cosine similarity is below --min-cosine; the
+same floor is asserted by Backend/tests/test_embedding_parity.py.
+
+Export the ONNX model once, then run from Backend/:
+    python -m agents.basic_agent.rag.embedder export
+    python -m benchmarks.embedding_parity
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KNOWLEDGE_BASE_DIR = os.path.join(BACKEND_DIR, "agents", "basic_agent", "knowledge_base")
+
+
+def load_texts():
+    from agents.basic_agent.evaluation.test import load_tests
+    from agents.basic_agent.rag.chunker import chunk_text
+
+    questions = [test.question for test in load_tests()]
+    chunks = []
+    for root, _, files in os.walk(KNOWLEDGE_BASE_DIR):
+        for name in sorted(files):
+            if name.endswith(".md"):
+                with open(os.path.join(root, name), "r", encoding="utf-8") as f:
+                    chunks.extend(text for _, text in chunk_text(f.read()))
+    return questions, chunks
+
+
+def timed_encode(label: str, backend: str, texts):
+    from agents.basic_agent.rag.embedder import get_embedder
+
+    start = time.perf_counter()
+    embedder = get_embedder(backend)
+    loaded = time.perf_counter()
+    vectors = np.asarray(embedder.encode(texts), dtype=np.float32)
+    done = time.perf_counter()
+    print(f"{label:<6} load {loaded - start:.2f}s, encode {len(texts)} texts in {done - loaded:.2f}s "
+          f"({1000 * (done - loaded) / len(texts):.1f} ms/text)")
+    return vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ONNX int8 vs torch embedding parity")
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+    questions, chunks = load_texts()
+    texts = questions + chunks
+
+    # ONNX first, so its load time is not flattered by torch already being imported
+    onnx_vectors = timed_encode("onnx", "onnx", texts)
+    torch_vectors = timed_encode("torch", "torch", texts)
+
+    cosine = np.sum(onnx_vectors * torch_vectors, axis=1)
+    print(f"cosine min {cosine.min():.4f}, mean {cosine.mean():.4f} over {len(texts)} texts")
+
+    q = len(questions)
+    k = min(args.k, len(chunks))
+    torch_top = np.argsort(-(torch_vectors[:q] @ torch_vectors[q:].T), axis=1)[:, :k]
+    onnx_top = np.argsort(-(onnx_vectors[:q] @ onnx_vectors[q:].T), axis=1)[:, :k]
+    overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(torch_top, onnx_top)])
+    print(f"retrieval overlap {overlap:.3f} of the torch top {k} over {q} questions")
+
+    if cosine.min() < args.min_cosine:
+        print(f"FAIL: cosine below {args.min_cosine}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Import-time budget check for the executor.
+
+Imports executor.py in a fresh interpreter and fails when the import takes
+longer than the budget, or when it pulls in modules that should only load
+once a BASIC email needs the RAG path.
+
+Usage (from the Backend folder):
+    python -m benchmarks.import_budget [budget_seconds]
+"""
+import os
+import subprocess
+import sys
+import json
+
+# Seconds allowed for `import executor`, overridable with IMPORT_BUDGET_SECONDS
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "3.0"))
+
+# Modules that must stay unloaded until the RAG path is used
+LAZY_MODULES = ["torch", "sentence_transformers", "onnxruntime", "chromadb", "langchain_huggingface", "litellm"]
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.dirname(BACKEND_DIR)
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import executor
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (LAZY_MODULES,)
+
+
+def measure() -> dict:
+    """Run the import probe in a fresh interpreter and return its measurements."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([BACKEND_DIR, PROJECT_DIR, env.get("PYTHONPATH", "")])
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # The probe prints its JSON result last, after any import-time logging
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else IMPORT_BUDGET_SECONDS
+    result = measure()
+
+    print(f"import executor: {result['seconds']:.3f}s (budget {budget:.3f}s)")
+    if result["loaded"]:
+        print(f"Heavy modules loaded at import time: {', '.join(result['loaded'])}")
+
+    if result["seconds"] > budget or result["loaded"]:
+        print("FAILED")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Offline classification throughput benchmark.
+
+Runs the executor's LLM classification over the emails stored in
+databases/memory.jsonl, first one after another and then on a thread pool,
+with the OpenAI client going through the record/replay transport.
+
+Record the fixture once against the live API:
+    python -m benchmarks.pipeline_bench --mode record --fixture classify_fixture.jsonl
+
+Then benchmark offline, with a simulated per-call latency:
+    python -m benchmarks.pipeline_bench --mode replay --fixture classify_fixture.jsonl --latency 0.8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MEMORY_PATH = os.path.join(os.path.dirname(BACKEND_DIR), "databases", "memory.jsonl")
+
+
+def load_emails(limit: int):
+    from core.preprocessor import CleanEmailData
+
+    emails = []
+    with open(MEMORY_PATH, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            emails.append(CleanEmailData(
+                email_id=record["email_id"],
+                from_name=record.get("from_name"),
+                from_email=record["from_email"],
+                subject=record["subject"],
+                message=record["message"],
+                time=record["time"],
+            ))
+            if len(emails) == limit:
+                break
+    return emails
+
+
+def timed(label: str, fn, count: int) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {count} emails in {elapsed:.2f}s ({count / elapsed:.2f} emails/s)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline classification throughput benchmark")
+    parser.add_argument("--mode", choices=["record", "replay"], default="replay")
+    parser.add_argument("--fixture", default="classify_fixture.jsonl")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated seconds per replayed call")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--limit", type=int, default=20, help="number of emails to classify")
+    args = parser.parse_args()
+
+    # Must be set before the executor builds its LLM client
+    os.environ["LLM_TRANSPORT"] = args.mode
+    os.environ["LLM_FIXTURE_PATH"] = os.path.abspath(args.fixture)
+    os.environ["LLM_REPLAY_LATENCY"] = str(args.latency)
+    os.environ["LLM_CACHE_ENABLED"] = "0"
+    # Force every email through the LLM so the local cascade does not skew results
+    os.environ["LOCAL_CLASSIFIER_THRESHOLD"] = "2"
+
+    sys.path.insert(0, BACKEND_DIR)
+    from executor import ExecuterAgent
+
+    executor = ExecuterAgent()
+    emails = load_emails(args.limit)
+
+    def serial():
+        for email in emails:
+            executor.classifier(email)
+
+    def concurrent():
+        def classify(email):
+            with executor.stage_limits["classify"]:
+                return executor.classifier(email)
+
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            list(pool.map(classify, emails))
+
+    serial_time = timed("serial", serial, len(emails))
+    if args.mode == "record":
+        print(f"Recorded fixture: {args.fixture}")
+        return
+
+    concurrent_time = timed("concurrent", concurrent, len(emails))
+    print(f"speedup      {serial_time / concurrent_time:.2f}x with {args.workers} workers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Vector index latency benchmark.
+
+Queries the Chroma collection and the in-process numpy index with the same
+vectors and reports per-query latency and how many of Chroma's top k the
+exact numpy search also returns. Queries are stored chunk embeddings with
+a little noise added, so no embedding model has to be loaded.
+
+Export the numpy index first if the knowledge base was ingested before it existed:
+    python -m agents.basic_agent.rag.vector_index
+
+Then run from Backend/:
+    python -m benchmarks.vector_index_bench --queries 200 --k 20
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def timed(label: str, index, queries, k: int):
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append(index.query(query, k))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<8} {len(queries)} queries in {elapsed:.3f}s ({1000 * elapsed / len(queries):.2f} ms/query)")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chroma vs numpy vector index benchmark")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--noise", type=float, default=0.05, help="std of the noise added to each query vector")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+    from agents.basic_agent.rag.answer import get_collection
+    from agents.basic_agent.rag.vector_index import ChromaIndex, NumpyIndex
+
+    chroma = ChromaIndex(get_collection())
+    numpy_index = NumpyIndex.load()
+    if len(numpy_index.ids) == 0:
+        print("Numpy index is empty, nothing to benchmark")
+        return
+
+    rng = np.random.default_rng(args.seed)
+    rows = rng.integers(0, len(numpy_index.ids), size=args.queries)
+    base = np.asarray(numpy_index.embeddings[rows], dtype=np.float32)
+    queries = base + rng.normal(0, args.noise, size=base.shape).astype(np.float32)
+
+    # Warm both indexes so lazy loading is not timed
+    chroma.query(queries[0], args.k)
+    numpy_index.query(queries[0], args.k)
+
+    chroma_results = timed("chroma", chroma, queries, args.k)
+    numpy_results = timed("numpy", numpy_index, queries, args.k)
+
+    overlap = []
+    for expected, actual in zip(chroma_results, numpy_results):
+        expected_docs = {doc for doc, _ in expected}
+        if expected_docs:
+            overlap.append(len(expected_docs & {doc for doc, _ in actual}) / len(expected_docs))
+    print(f"overlap  {np.mean(overlap):.3f} of chroma's top {args.k} also returned by numpy")
+
+
+if __name__ == "__main__":
+    main()
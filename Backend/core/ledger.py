@@ -0,0 +1,188 @@
+import sqlite3
+import hashlib
+import logging
+import os
+from datetime import datetime
+from typing import Optional
+
+# --------------------------
+# Logging setup
+# --------------------------
+logger = logging.getLogger("Ledger")
+
+# --------------------------
+# SQLite Database Setup
+# --------------------------
+DB_FOLDER = r"D:\Projects\inbox-manager\databases"
+DB_NAME = os.path.join(DB_FOLDER, "ledger.db")
+
+# Ledger statuses, in pipeline order
+RECEIVED = "RECEIVED"
+CLASSIFIED = "CLASSIFIED"
+HANDLING = "HANDLING"
+DONE = "DONE"
+FAILED = "FAILED"
+NEEDS_REVIEW = "NEEDS_REVIEW"
+
+MAX_ATTEMPTS = 3
+
+
+class ProcessedLedger:
+    """
+    Persistent record of every email the executor has seen, keyed by email_id.
+
+    The executor claims an email before classifying it, and moves it through
+    CLASSIFIED -> HANDLING -> DONE (or FAILED). On the next run the ledger is
+    consulted to skip emails that are already done and give failed or
+    interrupted ones another attempt. Every claim counts as an attempt, so an
+    email that keeps crashing the process is given up on after MAX_ATTEMPTS
+    too. Replies go through the idempotent outbox, so retrying an email
+    interrupted while HANDLING cannot send a second reply. An email whose
+    reply the outbox gave up on moves to NEEDS_REVIEW and is left alone.
+    """
+
+    def __init__(self, db_path: str = DB_NAME):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.create_table()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def create_table(self):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ledger (
+            email_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            content_hash TEXT NOT NULL,
+            classification TEXT,
+            last_error TEXT,
+            updated_at TEXT NOT NULL
+        )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_ledger_status ON ledger (status)")
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def content_hash(email) -> str:
+        """Hash of the fields that identify the content of a CleanEmailData."""
+        content = "\n".join([email.from_email, email.subject, email.message])
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get(self, email_id: str) -> Optional[dict]:
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        row = conn.execute("SELECT * FROM ledger WHERE email_id = ?", (email_id,)).fetchone()
+        conn.close()
+        return dict(row) if row else None
+
+    def settled(self, email_ids: list[str]) -> set[str]:
+        """The given emails that claim() would skip: done, waiting for review or out of attempts."""
+        if not email_ids:
+            return set()
+        conn = self._connect()
+        rows = []
+        # Stay under SQLite's limit on bound parameters
+        for start in range(0, len(email_ids), 500):
+            chunk = email_ids[start:start + 500]
+            rows += conn.execute(f"""
+            SELECT email_id FROM ledger
+            WHERE email_id IN ({", ".join("?" * len(chunk))})
+            AND (status IN (?, ?) OR attempts >= ?)
+            """, (*chunk, DONE, NEEDS_REVIEW, MAX_ATTEMPTS)).fetchall()
+        conn.close()
+        return {row[0] for row in rows}
+
+    def claim(self, email) -> bool:
+        """
+        Decide whether the email should be processed and, if so, start a new attempt.
+
+        Returns False for emails that are already done, have used up their
+        attempts, or are waiting for manual review.
+        """
+        content_hash = self.content_hash(email)
+        now = datetime.now().isoformat(timespec="seconds")
+
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            # Take the write lock up front so concurrent workers cannot claim the same email
+            cursor.execute("BEGIN IMMEDIATE")
+            row = cursor.execute(
+                "SELECT status, attempts, content_hash FROM ledger WHERE email_id = ?",
+                (email.email_id,)
+            ).fetchone()
+
+            if row is not None:
+                status, attempts, stored_hash = row
+                same_content = stored_hash == content_hash
+
+                if status == DONE and same_content:
+                    logger.info(f"Skipping email '{email.email_id}': already processed")
+                    conn.rollback()
+                    return False
+                if status == NEEDS_REVIEW:
+                    logger.info(f"Skipping email '{email.email_id}': waiting for manual review")
+                    conn.rollback()
+                    return False
+                if same_content and attempts >= MAX_ATTEMPTS:
+                    if status == FAILED:
+                        logger.info(f"Skipping email '{email.email_id}': failed {attempts} times")
+                        conn.rollback()
+                    else:
+                        # Every attempt so far was interrupted mid-pipeline (e.g. the process crashed)
+                        logger.warning(f"Giving up on email '{email.email_id}': interrupted {attempts} times")
+                        cursor.execute(
+                            "UPDATE ledger SET status = ?, last_error = ?, updated_at = ? WHERE email_id = ?",
+                            (FAILED, f"Interrupted in {status} {attempts} times", now, email.email_id)
+                        )
+                        conn.commit()
+                    return False
+
+                attempts = attempts + 1 if same_content else 1
+            else:
+                attempts = 1
+
+            cursor.execute("""
+            INSERT OR REPLACE INTO ledger
+            (email_id, status, attempts, content_hash, classification, last_error, updated_at)
+            VALUES (?, ?, ?, ?, NULL, NULL, ?)
+            """, (email.email_id, RECEIVED, attempts, content_hash, now))
+            conn.commit()
+            return True
+        finally:
+            conn.close()
+
+    def _set_status(self, email_id: str, status: str, classification: Optional[str] = None,
+                    error: Optional[str] = None):
+        conn = self._connect()
+        conn.execute("""
+        UPDATE ledger
+        SET status = ?,
+            classification = COALESCE(?, classification),
+            last_error = ?,
+            updated_at = ?
+        WHERE email_id = ?
+        """, (status, classification, error, datetime.now().isoformat(timespec="seconds"), email_id))
+        conn.commit()
+        conn.close()
+
+    def mark_classified(self, email_id: str, classification: str):
+        self._set_status(email_id, CLASSIFIED, classification=classification)
+
+    def mark_handling(self, email_id: str):
+        self._set_status(email_id, HANDLING)
+
+    def mark_done(self, email_id: str):
+        self._set_status(email_id, DONE)
+
+    def mark_failed(self, email_id: str, error: str):
+        self._set_status(email_id, FAILED, error=error)
+
+    def mark_needs_review(self, email_id: str, error: str):
+        """The email's reply could not be sent and was handed over for manual handling."""
+        self._set_status(email_id, NEEDS_REVIEW, error=error)
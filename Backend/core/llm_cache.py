@@ -0,0 +1,300 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from dotenv import load_dotenv
+from openai import OpenAI
+
+# --------------------------
+# Logging setup
+# --------------------------
+logger = logging.getLogger("LLMCache")
+
+load_dotenv(override=True)
+openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
+openrouter_url = os.getenv("OPENROUTER_URL")
+
+# --------------------------
+# Cache settings
+# --------------------------
+DB_FOLDER = r"D:\Projects\inbox-manager\databases"
+DB_NAME = os.path.join(DB_FOLDER, "llm_cache.db")
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") != "0"
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+
+
+def make_key(method: str, kwargs: dict) -> str:
+    """
+    Content-addressed cache key: a hash of the model, messages and every other request param.
+
+    A pydantic response_format is keyed by its JSON schema, so changing the
+    schema invalidates the cached responses that were parsed with it.
+    """
+    params = dict(kwargs)
+    response_format = params.get("response_format")
+    if isinstance(response_format, type) and hasattr(response_format, "model_json_schema"):
+        params["response_format"] = response_format.model_json_schema()
+    payload = json.dumps({"method": method, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    SQLite-backed cache of chat completion responses.
+
+    Entries expire after ttl_seconds. Once more than max_entries are stored,
+    the least recently used ones are evicted.
+    """
+
+    def __init__(self, db_path: str = DB_NAME, ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.create_table()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def create_table(self):
+        conn = self._connect()
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            key TEXT PRIMARY KEY,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)")
+        conn.commit()
+        conn.close()
+
+    def _count(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response JSON, or None on a miss or an expired entry."""
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            conn.close()
+            self._count(hit=False)
+            return None
+
+        response, created_at = row
+        if now - created_at > self.ttl_seconds:
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            conn.commit()
+            conn.close()
+            self._count(hit=False)
+            return None
+
+        conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+        conn.commit()
+        conn.close()
+        self._count(hit=True)
+        return response
+
+    def set(self, key: str, response: str):
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, response, created_at, last_access) VALUES (?, ?, ?, ?)",
+            (key, response, now, now)
+        )
+        count = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        if count > self.max_entries:
+            conn.execute("""
+            DELETE FROM llm_cache WHERE key IN (
+                SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?
+            )
+            """, (count - self.max_entries,))
+        conn.commit()
+        conn.close()
+
+    def clear(self):
+        conn = self._connect()
+        conn.execute("DELETE FROM llm_cache")
+        conn.commit()
+        conn.close()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+_bypass = threading.local()
+
+
+@contextmanager
+def bypass_llm_cache():
+    """
+    Skip cache lookups for the requests made by this thread inside the block.
+
+    For retries: a response that already failed parsing or validation would
+    otherwise come straight back from the cache. The fresh response still
+    replaces the cached one.
+    """
+    previous = getattr(_bypass, "active", False)
+    _bypass.active = True
+    try:
+        yield
+    finally:
+        _bypass.active = previous
+
+
+class CachedCompletions:
+    """Drop-in for client.chat.completions that serves repeated requests from an LLMCache."""
+
+    def __init__(self, completions, cache: LLMCache):
+        self._completions = completions
+        self.cache = cache
+
+    def _lookup(self, key: str) -> Optional[str]:
+        if getattr(_bypass, "active", False):
+            return None
+        return self.cache.get(key)
+
+    def create(self, **kwargs):
+        from openai.types.chat import ChatCompletion
+
+        if kwargs.get("stream"):
+            return self._completions.create(**kwargs)
+
+        key = make_key("create", kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return ChatCompletion.model_validate_json(cached)
+
+        response = self._completions.create(**kwargs)
+        self.cache.set(key, response.model_dump_json())
+        return response
+
+    def parse(self, **kwargs):
+        from openai.types.chat import ParsedChatCompletion
+
+        key = make_key("parse", kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            response_format = kwargs.get("response_format")
+            if isinstance(response_format, type):
+                return ParsedChatCompletion[response_format].model_validate_json(cached)
+            return ParsedChatCompletion.model_validate_json(cached)
+
+        response = self._completions.parse(**kwargs)
+        # A refusal or an answer that did not parse is not worth replaying
+        if all(choice.message.parsed is not None for choice in response.choices):
+            self.cache.set(key, response.model_dump_json())
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._completions, name)
+
+
+class CachedChat:
+    def __init__(self, chat, cache: LLMCache):
+        self._chat = chat
+        self.completions = CachedCompletions(chat.completions, cache)
+
+    def __getattr__(self, name):
+        return getattr(self._chat, name)
+
+
+class CachedOpenAI:
+    """OpenAI client wrapper whose chat completions go through an LLMCache."""
+
+    def __init__(self, client: OpenAI, cache: LLMCache):
+        self._client = client
+        self.cache = cache
+        self.chat = CachedChat(client.chat, cache)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """Return the process-wide cache shared by every agent."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache()
+        return _cache
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_llm_transport():
+    """
+    Return the record/replay transport selected by LLM_TRANSPORT, or None for live traffic.
+
+    LLM_TRANSPORT=record|replay, LLM_FIXTURE_PATH is the JSONL fixture and
+    LLM_REPLAY_LATENCY adds a delay in seconds to each replayed response.
+    The settings are read on first use so a benchmark can set them first.
+    """
+    global _transport
+    mode = os.getenv("LLM_TRANSPORT")
+    if not mode:
+        return None
+    with _transport_lock:
+        if _transport is None:
+            from core.llm_transport import RecordReplayTransport
+            _transport = RecordReplayTransport(
+                mode=mode,
+                fixture_path=os.getenv("LLM_FIXTURE_PATH", "llm_fixture.jsonl"),
+                latency=float(os.getenv("LLM_REPLAY_LATENCY", "0")),
+            )
+            logger.info(f"LLM traffic goes through {mode} transport ({_transport.fixture_path})")
+        return _transport
+
+
+def get_llm_client(api_key: Optional[str] = None, base_url: Optional[str] = None):
+    """
+    Build the OpenAI client used by the agents, wrapped in the shared cache.
+
+    Set LLM_CACHE_ENABLED=0 to get a plain OpenAI client, and LLM_TRANSPORT
+    to record or replay its traffic (see get_llm_transport).
+    """
+    transport = get_llm_transport()
+    if transport is None:
+        client = OpenAI(api_key=api_key or openrouter_api_key, base_url=base_url or openrouter_url)
+    else:
+        import httpx
+        client = OpenAI(
+            # Replay runs offline, where no API key is configured
+            api_key=api_key or openrouter_api_key or "replay",
+            base_url=base_url or openrouter_url,
+            http_client=httpx.Client(transport=transport),
+            max_retries=0 if transport.mode == "replay" else 2,
+        )
+    if not LLM_CACHE_ENABLED:
+        return client
+    return CachedOpenAI(client, get_llm_cache())
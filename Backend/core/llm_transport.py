@@ -0,0 +1,123 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+import httpx
+
+# --------------------------
+# Logging setup
+# --------------------------
+logger = logging.getLogger("LLMTransport")
+
+RECORD = "record"
+REPLAY = "replay"
+
+# Headers that describe the stored body rather than the original wire format
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+class ReplayMissError(httpx.TransportError):
+    """Raised in replay mode when the fixture has no recording for a request."""
+
+
+def request_key(request: httpx.Request) -> str:
+    """
+    Identify a request by method, path and body.
+
+    Headers are left out on purpose: they carry API keys, retry counters and
+    SDK versions that differ between the recording and the replay.
+    """
+    body = request.content or b""
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True).encode("utf-8")
+    except ValueError:
+        pass
+    digest = hashlib.sha256(body).hexdigest()
+    return f"{request.method} {request.url.path} {digest}"
+
+
+class RecordReplayTransport(httpx.BaseTransport):
+    """
+    httpx transport that records real exchanges to a JSONL fixture or replays them.
+
+    In record mode every request goes to the network and the response is
+    appended to the fixture. In replay mode responses come from the fixture,
+    optionally delayed by latency seconds to simulate the remote API; a
+    request that was never recorded raises ReplayMissError. Identical requests
+    recorded several times are replayed in recording order, then cycle.
+    """
+
+    def __init__(self, mode: str, fixture_path: str, latency: float = 0.0,
+                 transport: Optional[httpx.BaseTransport] = None):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown transport mode: {mode}")
+        self.mode = mode
+        self.fixture_path = fixture_path
+        self.latency = latency
+        self._transport = transport or httpx.HTTPTransport()
+        self._lock = threading.Lock()
+        self._recordings = {}
+        self._positions = {}
+        if mode == REPLAY:
+            self._load()
+
+    def _load(self):
+        if not os.path.exists(self.fixture_path):
+            raise FileNotFoundError(f"Replay fixture not found: {self.fixture_path}")
+        with open(self.fixture_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._recordings.setdefault(entry["key"], []).append(entry)
+        logger.info(f"Loaded {sum(len(v) for v in self._recordings.values())} recorded exchanges")
+
+    def _replay(self, request: httpx.Request) -> httpx.Response:
+        key = request_key(request)
+        with self._lock:
+            entries = self._recordings.get(key)
+            if not entries:
+                raise ReplayMissError(f"No recording for {request.method} {request.url.path}", request=request)
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            entry = entries[position % len(entries)]
+
+        if self.latency:
+            time.sleep(self.latency)
+        return httpx.Response(
+            status_code=entry["status_code"],
+            headers=entry["headers"],
+            content=entry["body"].encode("utf-8"),
+            request=request,
+        )
+
+    def _record(self, request: httpx.Request) -> httpx.Response:
+        response = self._transport.handle_request(request)
+        body = response.read()
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS}
+        entry = {
+            "key": request_key(request),
+            "status_code": response.status_code,
+            "headers": headers,
+            "body": body.decode("utf-8"),
+        }
+        with self._lock:
+            with open(self.fixture_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=headers,
+            content=body,
+            request=request,
+        )
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if self.mode == REPLAY:
+            return self._replay(request)
+        return self._record(request)
+
+    def close(self):
+        self._transport.close()
@@ -0,0 +1,262 @@
+import ast
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# --------------------------
+# Logging setup
+# --------------------------
+logger = logging.getLogger("LocalClassifier")
+
+DB_FOLDER = r"D:\Projects\inbox-manager\databases"
+MEMORY_PATH = os.path.join(DB_FOLDER, "memory.jsonl")
+EXAMPLES_DIR = Path(__file__).parent
+
+# Agent databases holding the sub-labels the LLM gave, per classifier kind
+SUB_LABEL_DATABASES = {
+    "PRIORITY": os.path.join(DB_FOLDER, "priority_emails.db"),
+    "NON_BUSINESS": os.path.join(DB_FOLDER, "nonbusiness_emails.db"),
+}
+
+# Minimum local confidence needed to skip the LLM, overridable per deployment
+LOCAL_CLASSIFIER_THRESHOLD = float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.85"))
+# The fixtures hold about one email per label, far too few to ever be confident,
+# so a classifier is only used once this many LLM-labelled emails are on record
+LOCAL_CLASSIFIER_MIN_HISTORY = int(os.getenv("LOCAL_CLASSIFIER_MIN_HISTORY", "50"))
+# retrain_local_classifiers() refits a classifier once this many new labelled emails have been recorded
+LOCAL_CLASSIFIER_RETRAIN_EVERY = int(os.getenv("LOCAL_CLASSIFIER_RETRAIN_EVERY", "25"))
+
+# Reasoning prefix of labels produced locally. Those rows in memory.jsonl are
+# not used for training, so the model never learns from its own guesses.
+LOCAL_REASONING_PREFIX = "Local classifier"
+
+TOP_LEVEL_LABELS = {"BASIC", "SCHEDULER", "PRIORITY", "NON_BUSINESS"}
+
+# Fixture file -> top-level label of every email it contains
+EXAMPLE_FILES = {
+    "basic_emails_examples.py": "BASIC",
+    "scheduler_emails_examples.py": "SCHEDULER",
+    "priority_emails_examples.py": "PRIORITY",
+    "nonbusiness_emails_examples.py": "NON_BUSINESS",
+}
+
+
+def email_text(subject: str, message: str) -> str:
+    return f"{subject}\n{message}"
+
+
+def load_fixture_examples() -> List[dict]:
+    """
+    Read the labelled emails from the *_emails_examples.py fixtures.
+
+    The fixtures create databases when imported, so they are parsed with ast
+    instead. Each example has a text, its top-level label and, where the
+    fixture has one, its sub-label.
+    """
+    examples = []
+    for file_name, label in EXAMPLE_FILES.items():
+        path = EXAMPLES_DIR / file_name
+        if not path.exists():
+            continue
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Call):
+                continue
+            fields = {}
+            for keyword in node.keywords:
+                try:
+                    fields[keyword.arg] = ast.literal_eval(keyword.value)
+                except (ValueError, TypeError):
+                    continue
+            if "message" in fields and "subject" in fields:
+                examples.append({
+                    "text": email_text(fields["subject"], fields["message"]),
+                    "label": label,
+                    "sub_label": fields.get("classification"),
+                })
+    return examples
+
+
+def load_memory_examples(memory_path: str = MEMORY_PATH) -> List[dict]:
+    """Read the emails the LLM classified successfully from memory.jsonl."""
+    examples = []
+    if not os.path.exists(memory_path):
+        return examples
+    with open(memory_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not record.get("success") or record.get("classification") not in TOP_LEVEL_LABELS:
+                continue
+            if str(record.get("reasoning", "")).startswith(LOCAL_REASONING_PREFIX):
+                continue
+            examples.append({
+                "text": email_text(record.get("subject", ""), record.get("message", "")),
+                "label": record["classification"],
+                "sub_label": None,
+            })
+    return examples
+
+
+def load_database_examples(kind: str) -> List[dict]:
+    """Read the emails the LLM gave a sub-label from the kind's agent database."""
+    db_path = SUB_LABEL_DATABASES.get(kind)
+    if db_path is None or not os.path.exists(db_path):
+        return []
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        rows = conn.execute("SELECT subject, message, classification, reasoning FROM emails").fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    finally:
+        conn.close()
+    return [
+        {"text": email_text(subject, message), "label": kind, "sub_label": classification}
+        for subject, message, classification, reasoning in rows
+        if classification and not str(reasoning).startswith(LOCAL_REASONING_PREFIX)
+    ]
+
+
+def load_history(kind: str) -> List[dict]:
+    """LLM-labelled emails for kind: memory.jsonl for "top", the agent database otherwise."""
+    if kind == "top":
+        return load_memory_examples(MEMORY_PATH)
+    return load_database_examples(kind)
+
+
+class LocalClassifier:
+    """TF-IDF + logistic regression text classifier fitted on labelled emails."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pipeline = None
+
+    def fit(self, texts: List[str], labels: List[str]) -> "LocalClassifier":
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import make_pipeline
+
+        if len(set(labels)) < 2:
+            raise ValueError(f"Local classifier '{self.name}' needs at least two labels to train")
+
+        self.pipeline = make_pipeline(
+            TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True, min_df=1),
+            LogisticRegression(max_iter=1000, class_weight="balanced"),
+        )
+        self.pipeline.fit(texts, labels)
+        logger.info(f"Local classifier '{self.name}' trained on {len(texts)} emails")
+        return self
+
+    def predict(self, subject: str, message: str) -> Tuple[str, float]:
+        """Return the most likely label and its probability."""
+        probabilities = self.pipeline.predict_proba([email_text(subject, message)])[0]
+        best = probabilities.argmax()
+        return str(self.pipeline.classes_[best]), float(probabilities[best])
+
+
+_classifiers = {}
+# Number of history examples each kind was last trained on (or found too few of)
+_history_sizes = {}
+_stats = {}
+_classifiers_lock = threading.Lock()
+
+
+def _train(kind: str, history: List[dict]) -> Optional[LocalClassifier]:
+    if len(history) < LOCAL_CLASSIFIER_MIN_HISTORY:
+        logger.info(f"Local classifier '{kind}' waits for {LOCAL_CLASSIFIER_MIN_HISTORY} labelled emails "
+                    f"(has {len(history)}), every email goes to the LLM")
+        return None
+
+    examples = load_fixture_examples() + history
+    if kind == "top":
+        pairs = [(e["text"], e["label"]) for e in examples]
+    else:
+        pairs = [(e["text"], e["sub_label"]) for e in examples if e["label"] == kind and e["sub_label"]]
+
+    try:
+        texts, labels = zip(*pairs) if pairs else ((), ())
+        return LocalClassifier(kind).fit(list(texts), list(labels))
+    except Exception as e:
+        logger.warning(f"Local classifier '{kind}' unavailable, every email goes to the LLM: {str(e)}")
+        return None
+
+
+def get_local_classifier(kind: str = "top") -> Optional[LocalClassifier]:
+    """
+    Return the fitted classifier for kind, training it on first use.
+
+    kind is "top" for the executor's BASIC/SCHEDULER/PRIORITY/NON_BUSINESS
+    labels, or "PRIORITY" / "NON_BUSINESS" for that category's sub-labels.
+    Returns None while there is not enough labelled history to train.
+    """
+    with _classifiers_lock:
+        if kind not in _classifiers:
+            history = load_history(kind)
+            _classifiers[kind] = _train(kind, history)
+            _history_sizes[kind] = len(history)
+        return _classifiers[kind]
+
+
+def retrain_local_classifiers(min_new_examples: int = LOCAL_CLASSIFIER_RETRAIN_EVERY) -> List[str]:
+    """
+    Refit the classifiers in use whose history has grown by min_new_examples since they were trained.
+
+    Called by the executor daemon between polls. Emails keep being classified
+    by the old model while the new one is fitted. Returns the retrained kinds.
+    """
+    with _classifiers_lock:
+        kinds = list(_classifiers)
+
+    retrained = []
+    for kind in kinds:
+        history = load_history(kind)
+        if len(history) - _history_sizes.get(kind, 0) < min_new_examples:
+            continue
+        classifier = _train(kind, history)
+        with _classifiers_lock:
+            _classifiers[kind] = classifier
+            _history_sizes[kind] = len(history)
+        if classifier is not None:
+            retrained.append(kind)
+    return retrained
+
+
+def _count(kind: str, hit: bool):
+    with _classifiers_lock:
+        counts = _stats.setdefault(kind, {"hits": 0, "misses": 0})
+        counts["hits" if hit else "misses"] += 1
+
+
+def local_classifier_stats() -> dict:
+    """Per kind, how many emails the local model labelled (hits) and left to the LLM (misses)."""
+    with _classifiers_lock:
+        return {
+            kind: dict(counts, hit_rate=counts["hits"] / (counts["hits"] + counts["misses"]))
+            for kind, counts in _stats.items()
+        }
+
+
+def classify_locally(subject: str, message: str, kind: str = "top",
+                     threshold: float = LOCAL_CLASSIFIER_THRESHOLD) -> Optional[Tuple[str, float]]:
+    """
+    Return (label, confidence) when the local model is confident enough, else None.
+
+    None means the caller should fall back to the LLM.
+    """
+    classifier = get_local_classifier(kind)
+    if classifier is None:
+        return None
+    label, confidence = classifier.predict(subject, message)
+    _count(kind, hit=confidence >= threshold)
+    if confidence < threshold:
+        return None
+    return label, confidence
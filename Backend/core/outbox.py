@@ -0,0 +1,335 @@
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+import requests
+
+from core.webhook_client import CircuitOpenError, get_webhook_client, never_reached_server
+
+# --------------------------
+# Logging setup
+# --------------------------
+logger = logging.getLogger("Outbox")
+
+# --------------------------
+# SQLite Database Setup
+# --------------------------
+DB_FOLDER = r"D:\Projects\inbox-manager\databases"
+DB_NAME = os.path.join(DB_FOLDER, "outbox.db")
+
+# Outbox statuses
+PENDING = "PENDING"
+SENDING = "SENDING"
+SENT = "SENT"
+FAILED = "FAILED"
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 30 * 60
+# A SENDING entry older than this belongs to a dispatcher that died mid-send;
+# the reply may or may not have gone out, so it is failed for review, never resent
+SENDING_LEASE_SECONDS = 120
+
+DISPATCH_WORKERS = 4
+DISPATCH_POLL_SECONDS = 2.0
+
+
+class Outbox:
+    """
+    Durable queue of outgoing replies.
+
+    Agents enqueue a reply as soon as it is generated; the dispatcher sends it
+    later. The channel is the n8n webhook name, and the idempotency key is
+    "<channel>:<email_id>", so enqueueing the same email twice (e.g. after a
+    crash and a re-run) never queues a second reply. The email itself is kept
+    with the reply so a reply that cannot be sent can go to manual handling.
+    """
+
+    def __init__(self, db_path: str = DB_NAME):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.create_table()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def create_table(self):
+        conn = self._connect()
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS outbox (
+            idempotency_key TEXT PRIMARY KEY,
+            email_id TEXT NOT NULL,
+            channel TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            email TEXT,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            result TEXT,
+            created_at TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_email ON outbox (email_id)")
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def idempotency_key(channel: str, email_id: str) -> str:
+        return f"{channel}:{email_id}"
+
+    def enqueue(self, email_id: str, channel: str, payload: dict, email: Optional[dict] = None) -> bool:
+        """Queue a reply; returns False if a reply for this email and channel was already queued."""
+        key = self.idempotency_key(channel, email_id)
+        now = time.time()
+        conn = self._connect()
+        cursor = conn.execute("""
+        INSERT OR IGNORE INTO outbox
+        (idempotency_key, email_id, channel, payload, email, status, attempts, next_attempt_at, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?, ?)
+        """, (key, email_id, channel, json.dumps(payload), json.dumps(email) if email else None, PENDING, now,
+              datetime.now().isoformat(timespec="seconds"), now))
+        conn.commit()
+        conn.close()
+        if cursor.rowcount == 0:
+            logger.info(f"Reply for email '{email_id}' already queued on {channel}")
+            return False
+        return True
+
+    def has_reply(self, email_id: str) -> bool:
+        """True if any reply for the email is queued, being sent or sent."""
+        conn = self._connect()
+        row = conn.execute("SELECT 1 FROM outbox WHERE email_id = ? LIMIT 1", (email_id,)).fetchone()
+        conn.close()
+        return row is not None
+
+    @staticmethod
+    def _entry(row) -> dict:
+        return dict(row, payload=json.loads(row["payload"]), email=json.loads(row["email"]) if row["email"] else None)
+
+    def claim_due(self, limit: int) -> list[dict]:
+        """Move up to limit due entries to SENDING and return them."""
+        now = time.time()
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            rows = cursor.execute("""
+            SELECT idempotency_key, email_id, channel, payload, email, attempts FROM outbox
+            WHERE status = ? AND next_attempt_at <= ?
+            ORDER BY next_attempt_at
+            LIMIT ?
+            """, (PENDING, now, limit)).fetchall()
+            for row in rows:
+                cursor.execute(
+                    "UPDATE outbox SET status = ?, attempts = attempts + 1, updated_at = ? WHERE idempotency_key = ?",
+                    (SENDING, now, row["idempotency_key"])
+                )
+            conn.commit()
+        finally:
+            conn.close()
+        return [dict(self._entry(row), attempts=row["attempts"] + 1) for row in rows]
+
+    def fail_stale(self) -> list[dict]:
+        """Fail the entries left in SENDING by a dispatcher that died mid-send, and return them."""
+        now = time.time()
+        error = "Interrupted while sending; the reply may or may not have been sent"
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            rows = cursor.execute("""
+            SELECT idempotency_key, email_id, channel, payload, email, attempts FROM outbox
+            WHERE status = ? AND updated_at <= ?
+            """, (SENDING, now - SENDING_LEASE_SECONDS)).fetchall()
+            for row in rows:
+                cursor.execute(
+                    "UPDATE outbox SET status = ?, last_error = ?, updated_at = ? WHERE idempotency_key = ?",
+                    (FAILED, error, now, row["idempotency_key"])
+                )
+            conn.commit()
+        finally:
+            conn.close()
+        return [dict(self._entry(row), last_error=error) for row in rows]
+
+    def mark_sent(self, key: str, result: dict):
+        conn = self._connect()
+        conn.execute(
+            "UPDATE outbox SET status = ?, result = ?, last_error = NULL, updated_at = ? WHERE idempotency_key = ?",
+            (SENT, json.dumps(result, default=str), time.time(), key)
+        )
+        conn.commit()
+        conn.close()
+
+    def mark_retry(self, key: str, attempts: int, error: str) -> str:
+        """Schedule a retry with jittered exponential backoff, or fail after MAX_ATTEMPTS."""
+        if attempts >= MAX_ATTEMPTS:
+            return self.mark_failed(key, error)
+        delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+        return self._set_status(key, PENDING, error, time.time() + random.uniform(delay / 2, delay))
+
+    def mark_failed(self, key: str, error: str) -> str:
+        """Give up on an entry; it is left for manual review."""
+        return self._set_status(key, FAILED, error, time.time())
+
+    def _set_status(self, key: str, status: str, error: str, next_attempt_at: float) -> str:
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "UPDATE outbox SET status = ?, next_attempt_at = ?, last_error = ?, updated_at = ? WHERE idempotency_key = ?",
+            (status, next_attempt_at, error, now, key)
+        )
+        conn.commit()
+        conn.close()
+        return status
+
+    def failed(self) -> list[dict]:
+        """Replies that were given up on, for manual review."""
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute("""
+        SELECT idempotency_key, email_id, channel, payload, email, attempts, last_error, created_at FROM outbox
+        WHERE status = ? ORDER BY created_at
+        """, (FAILED,)).fetchall()
+        conn.close()
+        return [self._entry(row) for row in rows]
+
+    def counts(self) -> dict:
+        conn = self._connect()
+        rows = conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        conn.close()
+        return dict(rows)
+
+
+class OutboxDispatcher:
+    """
+    Sends queued replies to their n8n webhooks on a small thread pool.
+
+    The reply webhooks send email, so a send is retried only when the request
+    never reached n8n: a connection failure, or the endpoint's circuit being
+    open. A timeout, a 5xx or an entry left in SENDING by a crash may already
+    have sent the reply, so those fail straight away for review, as does
+    anything still failing after MAX_ATTEMPTS. A failed entry, with its email,
+    payload and last_error, is handed to its channel's fallback (e.g. saving
+    the email and the unsent reply for manual handling).
+
+    start() runs the dispatcher in a background thread until stop(); drain()
+    sends everything currently due and returns, for one-shot runs.
+    """
+
+    def __init__(self, outbox: Outbox, fallbacks: Optional[Dict[str, Callable[[dict], None]]] = None,
+                 workers: int = DISPATCH_WORKERS, poll_seconds: float = DISPATCH_POLL_SECONDS):
+        self.outbox = outbox
+        self.fallbacks = fallbacks or {}
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="outbox")
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def _give_up(self, entry: dict, error: str):
+        logger.error(f"Reply for email '{entry['email_id']}' ({entry['channel']}) failed for review: {error}")
+        fallback = self.fallbacks.get(entry["channel"])
+        if fallback is None or not entry.get("email"):
+            return
+        try:
+            fallback(dict(entry, last_error=error))
+        except Exception as e:
+            logger.error(f"Fallback for email '{entry['email_id']}' failed: {str(e)}")
+
+    def _send(self, entry: dict):
+        key = entry["idempotency_key"]
+        try:
+            response = get_webhook_client().post(entry["channel"], entry["payload"])
+        except requests.RequestException as e:
+            if isinstance(e, CircuitOpenError) or never_reached_server(e):
+                status = self.outbox.mark_retry(key, entry["attempts"], str(e))
+                logger.warning(f"Reply for email '{entry['email_id']}' not delivered (attempt {entry['attempts']}, now {status}): {str(e)}")
+            else:
+                status = self.outbox.mark_failed(key, str(e))
+            if status == FAILED:
+                self._give_up(entry, str(e))
+            return
+
+        try:
+            result = response.json()
+        except ValueError:
+            result = {"raw_response": response.text}
+        if not response.ok:
+            error = f"HTTP {response.status_code}: {response.text[:200]}"
+        elif isinstance(result, dict) and result.get("status") in ("failed", "error"):
+            error = f"n8n reported {result.get('status')}: {result}"
+        else:
+            self.outbox.mark_sent(key, result)
+            logger.info(f"Sent reply for email '{entry['email_id']}' ({entry['channel']})")
+            return
+        self.outbox.mark_failed(key, error)
+        self._give_up(entry, error)
+
+    def dispatch_once(self) -> int:
+        """Send one batch of due entries concurrently; returns how many were attempted."""
+        for entry in self.outbox.fail_stale():
+            self._give_up(entry, entry["last_error"])
+        entries = self.outbox.claim_due(self.workers * 2)
+        list(self.pool.map(self._send, entries))
+        return len(entries)
+
+    def drain(self) -> int:
+        """Send until nothing is due (entries waiting on a retry backoff stay queued)."""
+        total = 0
+        while True:
+            sent = self.dispatch_once()
+            if not sent:
+                return total
+            total += sent
+
+    def _loop(self):
+        while not self.stop_event.is_set():
+            try:
+                if self.dispatch_once():
+                    continue
+            except Exception as e:
+                logger.error(f"Outbox dispatch failed: {str(e)}")
+            self.stop_event.wait(self.poll_seconds)
+
+    def start(self):
+        if self.running:
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._loop, name="outbox-dispatcher", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the background loop after the batch in flight."""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox() -> Outbox:
+    """Return the process-wide outbox shared by the agents and the dispatcher."""
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = Outbox()
+        return _outbox
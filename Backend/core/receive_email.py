@@ -4,10 +4,12 @@ from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 import base64
+import json
 from datetime import datetime
 import re
-from typing import List, Optional
+from typing import Callable, List, Optional, Set
 from pydantic import BaseModel, EmailStr
 import logging
 from colorama import Fore, Style, init
@@ -36,6 +38,7 @@ class EmailResponse(BaseModel):
     total_emails: int
     emails: List[EmailData]
     error: Optional[str] = None
+    history_id: Optional[str] = None
 
 class ColoredFormatter(logging.Formatter):
     """Custom formatter with yellow color for INFO logs."""
@@ -55,13 +58,20 @@ class ReceiveEmail:
     """Class to handle Gmail email retrieval."""
     
     SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
+    # Gmail accepts at most 100 calls in a single batch request
+    BATCH_SIZE = 100
+    # Largest page messages().list returns
+    LIST_PAGE_SIZE = 500
     
-    def __init__(self, credentials_path: str = 'credentials.json', token_path: str = 'token.json'):
+    def __init__(self, credentials_path: str = 'credentials.json', token_path: str = 'token.json', service=None,
+                 sync_state_path: str = 'sync_state.json'):
         """
     Initialize the ReceiveEmail class.
     Args:
         credentials_path: Path to credentials.json file
         token_path: Path to token.json file
+        service: Pre-built Gmail service (e.g. built with an HttpMock), skips authentication
+        sync_state_path: Path to the file storing the last synced historyId
     """
     # Get the directory where this script is located
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -75,7 +85,12 @@ class ReceiveEmail:
             self.token_path = os.path.join(script_dir, token_path)
         else:
             self.token_path = token_path
-        self.service = None
+        
+        if not os.path.isabs(sync_state_path):
+            self.sync_state_path = os.path.join(script_dir, sync_state_path)
+        else:
+            self.sync_state_path = sync_state_path
+        self.service = service
     # Setup logger
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)
@@ -157,18 +172,16 @@ class ReceiveEmail:
         
         return body
     
-    def _process_message(self, message_id: str) -> EmailData:
+    def _parse_message(self, msg: dict) -> EmailData:
         """
-        Process a single message and return EmailData object.
+        Convert a Gmail message resource into an EmailData object.
         
         Args:
-            message_id: Gmail message ID
+            msg: Message resource returned by users().messages().get
             
         Returns:
             EmailData object
         """
-        msg = self.service.users().messages().get(userId='me', id=message_id).execute()
-        
         headers = msg['payload']['headers']
         subject = next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject')
         from_field = next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown')
@@ -181,7 +194,7 @@ class ReceiveEmail:
         readable_time = datetime.fromtimestamp(timestamp_ms / 1000).strftime("%Y-%m-%d %H:%M:%S")
         
         return EmailData(
-            id=message_id,
+            id=msg['id'],
             sender_name=sender_name,
             sender_email=sender_email,
             subject=subject,
@@ -192,12 +205,101 @@ class ReceiveEmail:
             is_unread=True
         )
     
-    def fetch_unread_emails(self, max_results: int = 50) -> EmailResponse:
+    @staticmethod
+    def _is_not_found(error) -> bool:
+        """True for the 404 Gmail returns when a message was deleted after it was listed."""
+        return isinstance(error, HttpError) and error.resp.status == 404
+    
+    def _process_message(self, message_id: str) -> EmailData:
+        """
+        Process a single message and return EmailData object.
+        
+        Args:
+            message_id: Gmail message ID
+            
+        Returns:
+            EmailData object
+        """
+        msg = self.service.users().messages().get(userId='me', id=message_id).execute()
+        return self._parse_message(msg)
+    
+    def _process_messages_batch(self, message_ids: List[str]) -> List[EmailData]:
+        """
+        Fetch messages through Gmail batch requests, BATCH_SIZE gets per round-trip.
+        
+        Messages that fail inside a batch, or whose response cannot be parsed,
+        are retried individually so one bad message does not drop the rest.
+        Messages deleted since they were listed (404) are skipped.
+        
+        Args:
+            message_ids: Gmail message IDs, in the order they should be returned
+            
+        Returns:
+            List of EmailData objects in the same order as message_ids, minus deleted ones
+        """
+        fetched = {}
+        failed = []
+        
+        def handle(request_id, response, exception):
+            if self._is_not_found(exception):
+                self.logger.warning(f"Message {request_id} no longer exists, skipping")
+                return
+            if exception is not None:
+                self.logger.warning(f"Batch get failed for message {request_id}: {exception}")
+                failed.append(request_id)
+                return
+            try:
+                fetched[request_id] = self._parse_message(response)
+            except Exception as e:
+                self.logger.warning(f"Could not parse batched message {request_id}: {e}")
+                failed.append(request_id)
+        
+        for start in range(0, len(message_ids), self.BATCH_SIZE):
+            chunk = message_ids[start:start + self.BATCH_SIZE]
+            self.logger.info(f"Fetching messages {start + 1}-{start + len(chunk)} of {len(message_ids)} in one batch")
+            batch = self.service.new_batch_http_request(callback=handle)
+            for message_id in chunk:
+                batch.add(self.service.users().messages().get(userId='me', id=message_id), request_id=message_id)
+            batch.execute()
+        
+        for message_id in failed:
+            self.logger.info(f"Retrying message {message_id} individually")
+            email = self._process_message_if_exists(message_id)
+            if email is not None:
+                fetched[message_id] = email
+        
+        return [fetched[message_id] for message_id in message_ids if message_id in fetched]
+    
+    def _process_message_if_exists(self, message_id: str) -> Optional[EmailData]:
+        """Like _process_message, but returns None for a message deleted since it was listed."""
+        try:
+            return self._process_message(message_id)
+        except HttpError as e:
+            if not self._is_not_found(e):
+                raise
+            self.logger.warning(f"Message {message_id} no longer exists, skipping")
+            return None
+    
+    def _fetch_messages(self, messages: List[dict], use_batch: bool) -> List[EmailData]:
+        """Fetch full messages for the IDs returned by a list call, skipping deleted ones."""
+        if use_batch:
+            return self._process_messages_batch([message['id'] for message in messages])
+        
+        email_list = []
+        for idx, message in enumerate(messages, 1):
+            self.logger.info(f"Processing email {idx}/{len(messages)}")
+            email = self._process_message_if_exists(message['id'])
+            if email is not None:
+                email_list.append(email)
+        return email_list
+    
+    def fetch_unread_emails(self, max_results: int = 50, use_batch: bool = True) -> EmailResponse:
         """
         Fetch unread emails from Gmail.
         
         Args:
             max_results: Maximum number of emails to fetch
+            use_batch: Fetch message bodies through Gmail batch requests
             
         Returns:
             EmailResponse object with list of emails
@@ -226,11 +328,7 @@ class ReceiveEmail:
             
             self.logger.info(f"Found {len(messages)} unread emails. Processing...")
             
-            email_list = []
-            for idx, message in enumerate(messages, 1):
-                self.logger.info(f"Processing email {idx}/{len(messages)}")
-                email_data = self._process_message(message['id'])
-                email_list.append(email_data)
+            email_list = self._fetch_messages(messages, use_batch)
             
             self.logger.info(f"Successfully fetched {len(email_list)} unread emails")
             
@@ -249,12 +347,13 @@ class ReceiveEmail:
                 error=str(e)
             )
     
-    def fetch_all_emails(self, max_results: int = 50) -> EmailResponse:
+    def fetch_all_emails(self, max_results: int = 50, use_batch: bool = True) -> EmailResponse:
         """
         Fetch all emails from Gmail (read and unread).
         
         Args:
             max_results: Maximum number of emails to fetch
+            use_batch: Fetch message bodies through Gmail batch requests
             
         Returns:
             EmailResponse object with list of emails
@@ -283,11 +382,7 @@ class ReceiveEmail:
             
             self.logger.info(f"Found {len(messages)} emails. Processing...")
             
-            email_list = []
-            for idx, message in enumerate(messages, 1):
-                self.logger.info(f"Processing email {idx}/{len(messages)}")
-                email_data = self._process_message(message['id'])
-                email_list.append(email_data)
+            email_list = self._fetch_messages(messages, use_batch)
             
             self.logger.info(f"Successfully fetched {len(email_list)} emails")
             
@@ -307,6 +402,174 @@ class ReceiveEmail:
             )
     
 
+    def load_history_id(self) -> Optional[str]:
+        """Return the historyId stored by the last completed sync, if any."""
+        if not os.path.exists(self.sync_state_path):
+            return None
+        try:
+            with open(self.sync_state_path, 'r') as f:
+                return json.load(f).get('history_id')
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not read sync state, doing a full sync: {str(e)}")
+            return None
+    
+    def save_history_id(self, history_id: Optional[str]):
+        """
+        Persist the historyId to resume from on the next incremental sync.
+        
+        Call this only once the emails returned with that historyId are handled,
+        otherwise a crash in between would skip them.
+        """
+        if not history_id:
+            return
+        with open(self.sync_state_path, 'w') as f:
+            json.dump({'history_id': str(history_id)}, f)
+        self.logger.info(f"Saved sync state at historyId {history_id}")
+    
+    def _list_added_since(self, start_history_id: str) -> tuple:
+        """
+        List unread INBOX messages added after start_history_id.
+        
+        Returns:
+            Tuple of (list of {'id': ...} dicts, latest historyId)
+        """
+        messages = []
+        seen = set()
+        latest_history_id = start_history_id
+        
+        request = self.service.users().history().list(
+            userId='me',
+            startHistoryId=start_history_id,
+            historyTypes=['messageAdded'],
+            labelId='INBOX'
+        )
+        while request is not None:
+            response = request.execute()
+            for record in response.get('history', []):
+                for added in record.get('messagesAdded', []):
+                    message = added['message']
+                    labels = message.get('labelIds', [])
+                    if 'UNREAD' in labels and message['id'] not in seen:
+                        seen.add(message['id'])
+                        messages.append({'id': message['id']})
+            latest_history_id = response.get('historyId', latest_history_id)
+            request = self.service.users().history().list_next(request, response)
+        
+        return messages, latest_history_id
+    
+    @staticmethod
+    def _filter(messages: List[dict], exclude: Optional[Callable[[List[str]], Set[str]]]) -> List[dict]:
+        """Drop the messages whose IDs exclude returns."""
+        if exclude is None or not messages:
+            return messages
+        skipped = exclude([message['id'] for message in messages])
+        return [message for message in messages if message['id'] not in skipped]
+    
+    def _list_unread(self, limit: int, exclude: Optional[Callable[[List[str]], Set[str]]] = None) -> tuple:
+        """
+        List unread INBOX messages, following nextPageToken until limit are found.
+        
+        Returns:
+            Tuple of (up to limit {'id': ...} dicts, whether that is every unread message)
+        """
+        messages = []
+        request = self.service.users().messages().list(
+            userId='me',
+            maxResults=self.LIST_PAGE_SIZE,
+            labelIds=['INBOX', 'UNREAD']
+        )
+        while request is not None:
+            response = request.execute()
+            messages.extend(self._filter(response.get('messages', []), exclude))
+            if len(messages) > limit:
+                return messages[:limit], False
+            request = self.service.users().messages().list_next(request, response)
+        
+        return messages, True
+    
+    def fetch_new_emails(self, max_results: int = 50, use_batch: bool = True,
+                         exclude: Optional[Callable[[List[str]], Set[str]]] = None) -> EmailResponse:
+        """
+        Fetch unread emails added since the last sync.
+        
+        Uses the Gmail history API from the stored historyId. When no historyId
+        is stored, or Gmail no longer has history that far back, it falls back to
+        listing the INBOX+UNREAD backlog. The returned history_id should be
+        passed to save_history_id once the emails are handled. It is None while
+        more than max_results emails are waiting, so the next run lists from the
+        same point again and picks up the rest; exclude keeps it from returning
+        the emails that are already handled.
+        
+        Args:
+            max_results: Maximum number of emails to return
+            use_batch: Fetch message bodies through Gmail batch requests
+            exclude: Given message IDs, returns the ones not to fetch again
+            
+        Returns:
+            EmailResponse object with list of emails and the new history_id
+        """
+        try:
+            if not self.service:
+                self.authenticate()
+            
+            start_history_id = self.load_history_id()
+            messages = None
+            
+            if start_history_id:
+                self.logger.info(f"Fetching emails added since historyId {start_history_id}...")
+                try:
+                    messages, history_id = self._list_added_since(start_history_id)
+                    messages = self._filter(messages, exclude)
+                    complete = len(messages) <= max_results
+                    messages = messages[:max_results]
+                except HttpError as e:
+                    if e.resp.status != 404:
+                        raise
+                    self.logger.warning("Stored historyId has expired. Falling back to a full sync")
+            
+            if messages is None:
+                # Read the historyId before listing so nothing added in between is missed
+                history_id = self.service.users().getProfile(userId='me').execute()['historyId']
+                self.logger.info("Listing unread emails for a full sync...")
+                messages, complete = self._list_unread(max_results, exclude)
+            
+            if not complete:
+                self.logger.info(
+                    f"More than {max_results} unread emails waiting; returning the first {max_results} "
+                    f"and keeping the historyId until the rest are fetched"
+                )
+                history_id = None
+            history_id = str(history_id) if history_id else None
+            
+            if not messages:
+                self.logger.info("No new emails since last sync")
+                return EmailResponse(
+                    success=True,
+                    total_emails=0,
+                    emails=[],
+                    history_id=history_id
+                )
+            
+            self.logger.info(f"Found {len(messages)} new unread emails. Processing...")
+            email_list = self._fetch_messages(messages, use_batch)
+            self.logger.info(f"Successfully fetched {len(email_list)} new emails")
+            
+            return EmailResponse(
+                success=True,
+                total_emails=len(email_list),
+                emails=email_list,
+                history_id=history_id
+            )
+            
+        except Exception as e:
+            self.logger.error(f"Failed to fetch new emails: {str(e)}")
+            return EmailResponse(
+                success=False,
+                total_emails=0,
+                emails=[],
+                error=str(e)
+            )
+
 
 # Example usage (only for testing)
 if __name__ == '__main__':
@@ -0,0 +1,190 @@
+import json
+import logging
+import re
+from html import escape
+from string import Template
+from typing import Optional
+
+import openai
+from pydantic import BaseModel, Field, ValidationError
+
+# --------------------------
+# Logging setup
+# --------------------------
+logger = logging.getLogger("ReplyRenderer")
+
+# --------------------------
+# Structured reply content
+# --------------------------
+SENDER_NAME = "Alee"
+SENDER_TITLE = "Applied AI Engineer"
+
+
+class BulletPoint(BaseModel):
+    title: Optional[str] = Field(description="Optional short bold lead-in for the bullet, e.g. 'Large Language Models'; null if none.")
+    text: str = Field(description="The bullet text, without a leading dash or bullet character.")
+
+
+class Appointment(BaseModel):
+    date: str = Field(description="The proposed date, written out, e.g. 'January 15, 2026'.")
+    time: str = Field(description="The proposed time window, e.g. '08:00 AM - 10:00 AM'.")
+
+
+class ReplyContent(BaseModel):
+    """The text of a reply email; the HTML around it comes from the templates below."""
+    greeting: str = Field(description="Salutation line, e.g. 'Dear Sarah Johnson,'.")
+    paragraphs: list[str] = Field(description="Body paragraphs shown before the bullet list, as plain text.")
+    bullets: list[BulletPoint] = Field(description="Optional bullet list; empty if the reply needs none.")
+    closing_paragraphs: list[str] = Field(description="Paragraphs shown after the bullet list, as plain text; may be empty.")
+    sign_off: str = Field(description="Closing phrase before the signature, e.g. 'Best regards,'.")
+
+
+class AppointmentReply(ReplyContent):
+    appointment: Optional[Appointment] = Field(description="The single proposed slot, or null if no slot is available.")
+
+
+# --------------------------
+# Email-safe HTML templates
+# --------------------------
+# Parsed once at import; rendering is plain substitution. Table layout and
+# inline styles only, since many email clients drop <style> blocks.
+TEXT_STYLE = "font-size: 16px; line-height: 1.6; color: #333333;"
+
+PAGE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+</head>
+<body style="margin: 0; padding: 0; font-family: Arial, sans-serif;">
+    <table role="presentation" style="width: 100%; max-width: 600px; border-collapse: collapse;">
+        <tr>
+            <td style="padding: 20px;">
+$content
+                <p style="margin: 20px 0 0 0; $text_style">
+                    $sign_off<br>
+                    <strong>$sender_name</strong><br>
+                    <span style="color: #666666; font-size: 14px;">$sender_title</span>
+                </p>
+            </td>
+        </tr>
+    </table>
+</body>
+</html>
+""")
+
+PARAGRAPH = Template("""                <p style="margin: 0 0 15px 0; $text_style">$text</p>""")
+
+BULLET_LIST = Template("""                <ul style="margin: 0 0 15px 0; padding-left: 20px; font-size: 16px; line-height: 1.8; color: #333333;">
+$items
+                </ul>""")
+
+BULLET = Template("""                    <li style="margin-bottom: 8px;">$text</li>""")
+
+APPOINTMENT = Template("""                <table role="presentation" style="width: 100%; border-collapse: collapse; margin: 20px 0;">
+                    <tr>
+                        <td style="background: #f0f8ff; border-left: 4px solid #4a90e2; padding: 15px;">
+                            <div style="font-size: 18px; font-weight: bold; color: #4a90e2;">&#128197; $date</div>
+                            <div style="font-size: 16px; color: #555555; margin-top: 5px;">&#128336; $time</div>
+                        </td>
+                    </tr>
+                </table>""")
+
+
+def _text(value: str) -> str:
+    """Escape model text for HTML, keeping its line breaks."""
+    return escape(value.strip()).replace("\n", "<br>")
+
+
+def _paragraphs(paragraphs: list[str]) -> list[str]:
+    return [PARAGRAPH.substitute(text=_text(p), text_style=TEXT_STYLE) for p in paragraphs if p.strip()]
+
+
+def _bullet(bullet: BulletPoint) -> str:
+    text = _text(bullet.text)
+    if bullet.title:
+        text = f"<strong>{_text(bullet.title)}</strong> {text}"
+    return BULLET.substitute(text=text)
+
+
+def render_reply(reply: ReplyContent) -> str:
+    """Render structured reply content into the complete HTML email body."""
+    blocks = _paragraphs([reply.greeting] + reply.paragraphs)
+    if reply.bullets:
+        blocks.append(BULLET_LIST.substitute(items="\n".join(_bullet(b) for b in reply.bullets)))
+    appointment = getattr(reply, "appointment", None)
+    if appointment is not None:
+        blocks.append(APPOINTMENT.substitute(date=_text(appointment.date), time=_text(appointment.time)))
+    blocks += _paragraphs(reply.closing_paragraphs)
+
+    return PAGE.substitute(
+        content="\n".join(blocks),
+        sign_off=_text(reply.sign_off),
+        sender_name=SENDER_NAME,
+        sender_title=SENDER_TITLE,
+        text_style=TEXT_STYLE,
+    )
+
+
+# --------------------------
+# Requesting the reply content
+# --------------------------
+# What a provider or model without json_schema structured output answers parse() with
+STRUCTURED_OUTPUT_ERRORS = (openai.BadRequestError, openai.NotFoundError, openai.UnprocessableEntityError)
+
+JSON_INSTRUCTION = """Respond with only a JSON object that matches this JSON schema, with no other text:
+{schema}"""
+
+
+def plain_text_reply(text: str, response_format: type[ReplyContent] = ReplyContent) -> ReplyContent:
+    """Wrap a plain-text email into reply content, one paragraph per blank-line separated block."""
+    blocks = [block.strip() for block in re.split(r"\n\s*\n", text.strip()) if block.strip()]
+    greeting = ""
+    if blocks and "\n" not in blocks[0] and blocks[0].endswith(","):
+        greeting = blocks.pop(0)
+    sign_off = "Best regards,"
+    # Drop the model's own "Best regards,\nName" block; the template adds the signature
+    if blocks and blocks[-1].splitlines()[0].endswith(",") and len(blocks[-1].splitlines()) <= 3:
+        sign_off = blocks.pop().splitlines()[0]
+    fields = {"greeting": greeting, "paragraphs": blocks, "bullets": [], "closing_paragraphs": [], "sign_off": sign_off}
+    if "appointment" in response_format.model_fields:
+        fields["appointment"] = None
+    return response_format.model_validate(fields)
+
+
+def reply_from_text(text: str, response_format: type[ReplyContent] = ReplyContent) -> ReplyContent:
+    """Read reply content from a JSON answer, or treat the answer as the plain-text email."""
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+    if not text:
+        raise ValueError("Model returned no reply content")
+    try:
+        return response_format.model_validate_json(text)
+    except ValidationError:
+        logger.warning("Reply is not valid JSON for the schema, using it as plain text")
+        return plain_text_reply(text, response_format)
+
+
+def request_reply(client, model: str, messages: list[dict],
+                  response_format: type[ReplyContent] = ReplyContent) -> ReplyContent:
+    """
+    Ask the model for structured reply content.
+
+    Uses structured output (parse) when the provider supports it. When parse
+    is rejected, asks again with the JSON schema in the prompt through
+    create() and validates the answer, falling back to the answer as plain text.
+    """
+    try:
+        response = client.chat.completions.parse(model=model, messages=messages, response_format=response_format)
+    except STRUCTURED_OUTPUT_ERRORS as e:
+        logger.warning(f"Structured output rejected for {model} ({e.__class__.__name__}), asking for JSON in the prompt")
+        instruction = JSON_INSTRUCTION.format(schema=json.dumps(response_format.model_json_schema()))
+        response = client.chat.completions.create(
+            model=model,
+            messages=messages + [{"role": "system", "content": instruction}]
+        )
+        return reply_from_text(response.choices[0].message.content or "", response_format)
+
+    message = response.choices[0].message
+    if message.parsed is not None:
+        return message.parsed
+    return reply_from_text(message.content or "", response_format)
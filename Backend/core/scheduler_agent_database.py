@@ -23,7 +23,7 @@ os.makedirs(DB_FOLDER, exist_ok=True)
 DB_NAME = os.path.join(DB_FOLDER, "scheduler_emails.db")
 
 def create_db():
-    """Create the emails table with only the CleanEmailData columns."""
+    """Create the emails table with the CleanEmailData columns and the draft reply."""
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
     cursor.execute("""
@@ -33,9 +33,14 @@ def create_db():
         from_email TEXT NOT NULL,
         subject TEXT,
         message TEXT,
-        time TEXT
+        time TEXT,
+        crafted_email TEXT
     )
     """)
+    # Tables created before the draft reply was kept have no crafted_email column
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(emails)")]
+    if "crafted_email" not in columns:
+        cursor.execute("ALTER TABLE emails ADD COLUMN crafted_email TEXT")
     conn.commit()
     conn.close()
     logger.info(f"Database created at '{DB_NAME}' and table 'emails' ready.")
@@ -43,21 +48,27 @@ def create_db():
 # --------------------------
 # Insert Email
 # --------------------------
-def insert_email(email):
-    """Insert a CleanEmailData instance into the database."""
+def insert_email(email, crafted_email: Optional[str] = None):
+    """
+    Insert a CleanEmailData instance into the database.
+
+    crafted_email is a generated reply that could not be sent, shown as a
+    draft for manual handling.
+    """
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
     cursor.execute("""
     INSERT OR REPLACE INTO emails
-    (email_id, from_name, from_email, subject, message, time)
-    VALUES (?, ?, ?, ?, ?, ?)
+    (email_id, from_name, from_email, subject, message, time, crafted_email)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
     """, (
         email.email_id,
         email.from_name,
         email.from_email,
         email.subject,
         email.message,
-        email.time
+        email.time,
+        crafted_email
     ))
     conn.commit()
     conn.close()
@@ -1,4 +1,5 @@
 import requests
+from core.webhook_client import get_webhook_client
 
 def send_to_n8n(data):
     """
@@ -8,11 +9,9 @@ def send_to_n8n(data):
     Returns:
         dict: Response from the n8n webhook (parsed as JSON if possible).
     """
-    url = "http://localhost:5678/webhook/98268ad9-e026-44f4-9612-a5030f1ef890"
-    
     try:
         data = {"subject": data['subject'], "body": data['body']}
-        response = requests.post(url, json=data)
+        response = get_webhook_client().post("priority_notify", data)
         response.raise_for_status()  # Raises an error if the request failed
         # Try to parse JSON response, fallback to text
         try:
@@ -0,0 +1,188 @@
+import logging
+import os
+import random
+import threading
+import time
+from typing import NamedTuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# --------------------------
+# Logging setup
+# --------------------------
+logger = logging.getLogger("WebhookClient")
+
+# --------------------------
+# n8n webhooks
+# --------------------------
+N8N_BASE_URL = os.getenv("N8N_BASE_URL", "http://localhost:5678")
+
+
+class Endpoint(NamedTuple):
+    path: str
+    # (connect, read) seconds; the read timeout covers n8n's own Gmail/Calendar round trip
+    timeout: tuple
+    # Safe to repeat after a timeout or 5xx, i.e. the request has no side effect
+    idempotent: bool = False
+
+
+ENDPOINTS = {
+    "basic_reply": Endpoint("/webhook/b2a962e2-927f-40d9-8e60-ccf4241c3228", (3.05, 30)),
+    "scheduler_reply": Endpoint("/webhook/940d1ba2-2624-4de7-a320-18bd4fa525b4", (3.05, 30)),
+    "nonbusiness_reply": Endpoint("/webhook/5ff54f86-9344-4dcf-b5f0-e1e6c637a5e6", (3.05, 30)),
+    "priority_reply": Endpoint("/webhook/27dd1715-2450-4a71-886d-8f1070592870", (3.05, 30)),
+    "priority_notify": Endpoint("/webhook/98268ad9-e026-44f4-9612-a5030f1ef890", (3.05, 10)),
+    "calendar_events": Endpoint("/webhook/a02479d5-bb46-40ab-9b03-7ebbd47f8a0d", (3.05, 10), idempotent=True),
+    "mark_calendar": Endpoint("/webhook/4bf897c5-dfe6-47b2-9d1d-49c7cd28e29d", (3.05, 10)),
+}
+
+# --------------------------
+# Client settings
+# --------------------------
+POOL_SIZE = 16
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 5.0
+# Consecutive failures before an endpoint's circuit opens, and how long it stays open
+BREAKER_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30.0
+
+RETRYABLE_STATUS = {502, 503, 504}
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised without touching the network while an endpoint's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Stops calling an endpoint after repeated failures.
+
+    After threshold consecutive failures the circuit opens and calls fail
+    fast with CircuitOpenError. Once reset_seconds have passed, one trial
+    call is let through; it closes the circuit on success or reopens it.
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self, name: str):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_seconds or self.trial_in_flight:
+                raise CircuitOpenError(f"Circuit open for webhook '{name}'")
+            self.trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self, name: str):
+        with self._lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                if self.opened_at is None:
+                    logger.warning(f"Opening circuit for webhook '{name}' after {self.failures} failures")
+                self.opened_at = time.monotonic()
+
+
+def never_reached_server(error: requests.RequestException) -> bool:
+    """True if the request failed before n8n could have received it, so repeating it cannot double-send."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.ConnectionError) and error.args:
+        reason = getattr(error.args[0], "reason", None)
+        return type(reason).__name__ == "NewConnectionError"
+    return False
+
+
+class WebhookClient:
+    """
+    Shared HTTP client for the n8n webhooks.
+
+    One requests.Session with a pooled HTTPAdapter keeps connections to n8n
+    alive between calls. Every endpoint has its own timeout and circuit
+    breaker. Failed calls are retried with jittered exponential backoff, but
+    only when repeating them is safe: connection failures for any endpoint,
+    plus timeouts and 502/503/504 for idempotent ones.
+    """
+
+    def __init__(self, base_url: str = N8N_BASE_URL, endpoints: Optional[dict] = None,
+                 max_retries: int = MAX_RETRIES):
+        self.base_url = base_url.rstrip("/")
+        self.endpoints = endpoints or ENDPOINTS
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.endpoints), pool_maxsize=POOL_SIZE, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.breakers = {name: CircuitBreaker() for name in self.endpoints}
+
+    def _should_retry(self, endpoint: Endpoint, error: Optional[Exception], response) -> bool:
+        if error is not None:
+            if never_reached_server(error):
+                return True
+            return endpoint.idempotent and isinstance(error, (requests.Timeout, requests.ConnectionError))
+        return endpoint.idempotent and response.status_code in RETRYABLE_STATUS
+
+    def request(self, method: str, name: str, **kwargs) -> requests.Response:
+        """Call a named webhook; raises requests.RequestException (including CircuitOpenError) on failure."""
+        endpoint = self.endpoints[name]
+        breaker = self.breakers[name]
+        url = self.base_url + endpoint.path
+        kwargs.setdefault("timeout", endpoint.timeout)
+
+        attempt = 0
+        while True:
+            breaker.before_call(name)
+            error, response = None, None
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.RequestException as e:
+                error = e
+
+            failed = error is not None or response.status_code >= 500
+            if failed:
+                breaker.record_failure(name)
+            else:
+                breaker.record_success()
+                return response
+
+            if attempt >= self.max_retries or not self._should_retry(endpoint, error, response):
+                if error is not None:
+                    raise error
+                return response
+
+            attempt += 1
+            delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+            logger.info(f"Retrying webhook '{name}' in {delay:.2f}s (attempt {attempt + 1})")
+            time.sleep(delay)
+
+    def post(self, name: str, payload: dict, **kwargs) -> requests.Response:
+        return self.request("POST", name, json=payload, **kwargs)
+
+    def get(self, name: str, **kwargs) -> requests.Response:
+        return self.request("GET", name, **kwargs)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_webhook_client() -> WebhookClient:
+    """Return the process-wide webhook client, so every caller shares its connection pool."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = WebhookClient()
+        return _client
@@ -1,18 +1,23 @@
 import os
 import logging
 import json
+import signal
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Optional
 from dotenv import load_dotenv
-from openai import OpenAI
+from core.llm_cache import LLM_CACHE_ENABLED, get_llm_client, get_llm_cache
 from pydantic import BaseModel, Field
 
 # Internal imports (assuming these exist in your project structure)
 from core.preprocessor import EmailPreprocessor
 from core.receive_email import ReceiveEmail
-from agents.basic_agent.basic_agent import BasicAgent
-from agents.scheduler_agent.scheduler_agent import SchedulerAgent
-from agents.priority_agent.priority_agent import PriorityAgent
-from agents.nonbusiness_agent.nonbusiness_agent import NonBusinessAgent
+from core.ledger import ProcessedLedger
+from core.outbox import OutboxDispatcher, get_outbox
+from agents.scheduler_agent.read_calendar import get_calendar_cache
+from core.local_classifier import (classify_locally, local_classifier_stats, retrain_local_classifiers,
+                                   LOCAL_CLASSIFIER_THRESHOLD, LOCAL_REASONING_PREFIX)
 from color import Agent
 
 # Setup basic logging for the module
@@ -22,6 +27,46 @@ load_dotenv(override=True)
 openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
 openrouter_url = os.getenv("OPENROUTER_URL")
 
+# Concurrent run settings: size of the worker pool and the maximum number of
+# emails allowed inside each stage at the same time.
+MAX_WORKERS = 8
+STAGE_LIMITS = {
+    "classify": 8,
+    "BASIC": 3,
+    "SCHEDULER": 2,
+    "PRIORITY": 4,
+    "NON_BUSINESS": 4,
+}
+
+def build_basic_agent():
+    from agents.basic_agent.basic_agent import BasicAgent
+    return BasicAgent()
+
+def build_scheduler_agent():
+    from agents.scheduler_agent.scheduler_agent import SchedulerAgent
+    return SchedulerAgent()
+
+def build_priority_agent():
+    from agents.priority_agent.priority_agent import PriorityAgent
+    return PriorityAgent()
+
+def build_nonbusiness_agent():
+    from agents.nonbusiness_agent.nonbusiness_agent import NonBusinessAgent
+    return NonBusinessAgent()
+
+# Agents are imported and built the first time an email is routed to them, so a
+# run that never sees a BASIC email never loads the embedding model or Chroma.
+AGENT_FACTORIES = {
+    "basic_agent": build_basic_agent,
+    "scheduler_agent": build_scheduler_agent,
+    "priority_agent": build_priority_agent,
+    "nonbusiness_agent": build_nonbusiness_agent,
+}
+
+# Daemon polling interval bounds, in seconds
+MIN_POLL_INTERVAL = 5
+MAX_POLL_INTERVAL = 300
+
 class CleanEmailData(BaseModel):
     """Pydantic model for cleaned email data."""
     email_id: str = Field(description="Unique identifier for the email.")
@@ -36,6 +81,16 @@ class Executer(BaseModel):
     confidence: float = Field(description="the confidence level of how certain the model is for the classification made")
     reasoning: str = Field(description="precise explanation of why a certain classification is made")
 
+class JointExecuter(Executer):
+    sub_classification: Optional[str] = Field(default=None, description="the sub-category for PRIORITY or NON_BUSINESS emails, null otherwise")
+    sub_confidence: Optional[float] = Field(default=None, description="the confidence level of the sub-category, null when there is none")
+
+# Sub-labels the PriorityAgent and NonBusinessAgent accept from the joint classifier
+SUB_LABELS = {
+    "PRIORITY": {"APPOINTMENT", "CLIENT_COMMUNICATION", "HIGH_VALUE", "SENSITIVE"},
+    "NON_BUSINESS": {"PERSONAL", "PROMOTIONAL", "INFORMATIONAL", "SPAM"},
+}
+
 class Result(BaseModel):
     email_id: str = Field(description="Unique identifier for the email.")
     from_name: Optional[str] = None
@@ -167,42 +222,121 @@ Now analyze the incoming email and return your classification.
 
 """
 
+JOINT_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+SUB-CATEGORY (JOINT MODE)
+
+In addition to the classification above, pick exactly ONE sub-category when the
+classification is PRIORITY or NON_BUSINESS, and return it with its own confidence:
+
+PRIORITY sub-categories:
+- APPOINTMENT: appointment confirmations, acceptances, or scheduling
+- CLIENT_COMMUNICATION: ongoing communications with current clients
+- HIGH_VALUE: project or service inquiries valued at $5,000 or more
+- SENSITIVE: legal, financial, contractual, or compliance issues, including bank notifications
+
+NON_BUSINESS sub-categories:
+- PERSONAL: friends, family, or social contacts, including social event invitations
+- PROMOTIONAL: advertising, offers, or newsletters from companies or social platforms
+- INFORMATIONAL: receipts, order confirmations, updates, or announcements
+- SPAM: unsolicited, irrelevant, or potentially harmful bulk email
+
+In joint mode your JSON object also contains:
+  "sub_classification": one of the sub-categories above, or null for BASIC and SCHEDULER,
+  "sub_confidence": 0.0-1.0, or null for BASIC and SCHEDULER
+"""
+
 class ExecuterAgent(Agent):
     name = "ExecutorAgent"
     color = Agent.MAGENTA
     
-    def __init__(self):
+    def __init__(self, incremental_sync: bool = True, joint_classification: bool = True):
+        self.incremental_sync = incremental_sync
+        self.joint_classification = joint_classification
         self.preprocessor = EmailPreprocessor()
         self.receive_email = ReceiveEmail()
-        self.basic_agent = BasicAgent()
-        self.scheduler_agent = SchedulerAgent()
-        self.priority_agent = PriorityAgent()
-        self.nonbusiness_agent = NonBusinessAgent()
-        self.client = OpenAI(api_key=openrouter_api_key, base_url=openrouter_url)
+        self.ledger = ProcessedLedger()
+        self.outbox = get_outbox()
+        self.dispatcher = OutboxDispatcher(self.outbox, {
+            "basic_reply": self.save_unsent_basic_reply,
+            "scheduler_reply": self.save_unsent_scheduler_reply,
+        })
+        self._agents = {}
+        self._agent_locks = {key: threading.Lock() for key in AGENT_FACTORIES}
+        self.client = get_llm_client()
         self.memory_path = r"D:\Projects\inbox-manager\databases\memory.jsonl"
+        self.stage_limits = {stage: threading.BoundedSemaphore(limit) for stage, limit in STAGE_LIMITS.items()}
+        self.stop_event = threading.Event()
         self.log("ExecutorAgent initialized successfully")
 
+    def get_agent(self, key: str):
+        """Return the agent registered under key in AGENT_FACTORIES, building it on first use."""
+        with self._agent_locks[key]:
+            if key not in self._agents:
+                self.log(f"Loading {key}")
+                self._agents[key] = AGENT_FACTORIES[key]()
+            return self._agents[key]
+
+    @property
+    def basic_agent(self):
+        return self.get_agent("basic_agent")
+
+    @property
+    def scheduler_agent(self):
+        return self.get_agent("scheduler_agent")
+
+    @property
+    def priority_agent(self):
+        return self.get_agent("priority_agent")
+
+    @property
+    def nonbusiness_agent(self):
+        return self.get_agent("nonbusiness_agent")
+
     def user(self, email):
         return f""" 
             here is the email to classify:
             {email.message}"""
 
+    def local_classifier(self, email) -> Optional[Executer]:
+        """Classify with the local model, or return None when it is not confident enough."""
+        try:
+            local = classify_locally(email.subject, email.message)
+        except Exception as e:
+            self.log(f"Local classification failed, using LLM: {str(e)}")
+            return None
+        if local is None:
+            return None
+
+        label, confidence = local
+        self.log(f"Local classification: {label} (confidence: {confidence:.2f}), skipping LLM")
+        return Executer(
+            classification=label,
+            confidence=confidence,
+            reasoning=f"{LOCAL_REASONING_PREFIX} match on labelled email history"
+        )
+
     def classifier(self, email):
         self.log(f"Starting classification for email_id={email.email_id}")
         self.log(f"Email subject: '{email.subject}' from {email.from_email}")
+
+        result = self.local_classifier(email)
+        if result is not None:
+            return result
         
         try:
             response = self.client.chat.completions.parse(
                 model="gpt-4.1-mini",
                 messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "system", "content": JOINT_SYSTEM_PROMPT if self.joint_classification else SYSTEM_PROMPT},
                     {"role": "user", "content": self.user(email)},
                 ],
-                response_format=Executer
+                response_format=JointExecuter if self.joint_classification else Executer
             )
             
             result = response.choices[0].message.parsed
             self.log(f"Classification complete: {result.classification} (confidence: {result.confidence:.2f})")
+            if getattr(result, "sub_classification", None):
+                self.log(f"Sub-classification: {result.sub_classification}")
             self.log(f"Reasoning: {result.reasoning}")
             
             return result
@@ -211,6 +345,28 @@ class ExecuterAgent(Agent):
             self.log(f"Classification failed: {str(e)}")
             raise
 
+    def log_cache_stats(self):
+        # get_llm_cache() creates the cache database, so leave it alone when the cache is off
+        if LLM_CACHE_ENABLED:
+            stats = get_llm_cache().stats()
+            self.log(f"LLM cache: {stats['hits']} hit(s), {stats['misses']} miss(es), hit rate {stats['hit_rate']:.0%}")
+        for kind, counts in local_classifier_stats().items():
+            self.log(f"Local classifier ({kind}): {counts['hits']} hit(s), {counts['misses']} miss(es), "
+                     f"hit rate {counts['hit_rate']:.0%} at threshold {LOCAL_CLASSIFIER_THRESHOLD}")
+        calendar = get_calendar_cache().stats()
+        if calendar["reads"]:
+            self.log(f"Calendar cache: {calendar['fetches']} fetch(es) for {calendar['reads']} read(s)")
+
+    def refresh_local_classifiers(self):
+        """Refit the local classifiers on the emails the LLM has labelled since they were trained."""
+        try:
+            retrained = retrain_local_classifiers()
+        except Exception as e:
+            self.log(f"Local classifier retraining failed: {str(e)}")
+            return
+        if retrained:
+            self.log(f"Retrained local classifier(s): {', '.join(retrained)}")
+
     def save_to_memory(self, result: Result):
         self.log(f"Saving result to memory.jsonl for email_id={result.email_id}")
         try:
@@ -221,104 +377,333 @@ class ExecuterAgent(Agent):
             self.log(f"Failed to save to memory: {str(e)}")
             raise
 
-    def run(self):
+    def sub_classification(self, classification) -> Optional[Executer]:
+        """
+        Return the precomputed sub-label from a joint classification, if it is usable.
+
+        The PriorityAgent and NonBusinessAgent skip their own classifier call
+        when they receive one.
+        """
+        label = getattr(classification, "sub_classification", None)
+        if not label:
+            return None
+        label = label.strip().upper()
+        if label not in SUB_LABELS.get(classification.classification, set()):
+            self.log(f"Ignoring sub-classification {label} for {classification.classification}")
+            return None
+        confidence = classification.sub_confidence
+        return Executer(
+            classification=label,
+            confidence=confidence if confidence is not None else classification.confidence,
+            reasoning=classification.reasoning
+        )
+
+    def route(self, email, classification):
+        """Hand the email to the agent matching its classification."""
+        self.log(f"Routing email_id={email.email_id} to {classification.classification} agent")
+        sub_classification = self.sub_classification(classification)
+
+        if classification.classification == "BASIC":
+            self.log("Delegating to BasicAgent")
+            self.basic_agent.run(email)
+        elif classification.classification == "SCHEDULER":
+            self.log("Delegating to SchedulerAgent")
+            self.scheduler_agent.run(email)
+        elif classification.classification == "PRIORITY":
+            self.log("Delegating to PriorityAgent")
+            self.priority_agent.run(email, classification=sub_classification)
+        elif classification.classification == "NON_BUSINESS":
+            self.log("Delegating to NonBusinessAgent")
+            self.nonbusiness_agent.run(email, classification=sub_classification)
+        else:
+            raise ValueError(f"Invalid classification: {classification.classification}")
+
+    def process_email(self, email) -> Optional[Result]:
+        """
+        Classify and route a single email, returning the result record to save.
+
+        Returns None when the ledger says the email must not be processed again.
+        """
+        self.log(f"Email ID: {email.email_id}")
+        self.log(f"From: {email.from_name} <{email.from_email}>")
+        self.log(f"Subject: {email.subject}")
+
+        if not self.ledger.claim(email):
+            self.log(f"Skipping email_id={email.email_id} (already handled per ledger)")
+            return None
+
+        if self.outbox.has_reply(email.email_id):
+            # An earlier attempt queued the reply before it was interrupted
+            self.log(f"Reply for email_id={email.email_id} already queued, marking done")
+            self.ledger.mark_done(email.email_id)
+            return None
+
+        try:
+            # Phase 3a: Classification
+            self.log("Phase 3a: Classifying email")
+            with self.stage_limits["classify"]:
+                classification = self.classifier(email)
+            self.ledger.mark_classified(email.email_id, classification.classification)
+
+            # Phase 3b: Route to appropriate agent
+            self.log(f"Phase 3b: Routing to {classification.classification} agent")
+            limit = self.stage_limits.get(classification.classification)
+            if limit is None:
+                raise ValueError(f"Invalid classification: {classification.classification}")
+            with limit:
+                self.ledger.mark_handling(email.email_id)
+                self.route(email, classification)
+            self.ledger.mark_done(email.email_id)
+
+            # Phase 3c: Create result
+            self.log("Phase 3c: Creating result record")
+            result = Result(
+                email_id=email.email_id,
+                from_name=email.from_name,
+                from_email=email.from_email,
+                subject=email.subject,
+                message=email.message,
+                time=email.time,
+                classification=classification.classification,
+                confidence=classification.confidence,
+                reasoning=classification.reasoning,
+                success=True
+            )
+            self.log(f"✓ Email {email.email_id} processed successfully")
+            return result
+
+        except Exception as e:
+            self.log(f"✗ Pipeline failed for email_id={email.email_id}")
+            self.log(f"Error details: {str(e)}")
+            self.ledger.mark_failed(email.email_id, str(e))
+
+            return Result(
+                email_id=email.email_id,
+                from_name=email.from_name,
+                from_email=email.from_email,
+                subject=email.subject,
+                message=email.message,
+                time=email.time,
+                classification="ERROR",
+                confidence=0.0,
+                reasoning=str(e),
+                success=False
+            )
+
+    def fetch_emails(self, max_results: int):
+        """
+        Fetch and preprocess unread emails.
+
+        Returns the cleaned emails and the Gmail historyId to commit once they
+        are handled (None when incremental sync is off, the fetch failed or more
+        than max_results emails are waiting).
+        """
+        # Phase 1: Fetch emails
+        if self.incremental_sync:
+            self.log("Phase 1: Fetching emails added since last sync")
+            raw_email = self.receive_email.fetch_new_emails(max_results=max_results, exclude=self.ledger.settled)
+        else:
+            self.log("Phase 1: Fetching unread emails")
+            raw_email = self.receive_email.fetch_unread_emails(max_results=max_results)
+
+        # Phase 2: Preprocess emails
+        self.log("Phase 2: Preprocessing emails")
+        cleaned_emails = self.preprocessor.process_email_response(raw_email)
+        self.log(f"Preprocessed {len(cleaned_emails.emails)} email(s)")
+        return cleaned_emails.emails, raw_email.history_id
+
+    def save_sync_state(self, emails, history_id: Optional[str]):
+        """
+        Save the historyId once every email of the batch is settled in the ledger.
+
+        The history API never returns an email twice, so while one failed and
+        has attempts left the historyId is kept, and the next run lists the
+        failed email again to retry it.
+        """
+        if not history_id:
+            return
+        email_ids = [email.email_id for email in emails]
+        retrying = set(email_ids) - self.ledger.settled(email_ids)
+        if retrying:
+            self.log(f"{len(retrying)} email(s) will be retried next run, not advancing the historyId")
+            return
+        self.receive_email.save_history_id(history_id)
+
+    def run(self, max_results: int = 1) -> int:
+        """Process emails one after another. Returns the number of emails fetched."""
         self.log("=" * 60)
         self.log("Executor run started")
         self.log("=" * 60)
         
         try:
-            # Phase 1: Fetch emails
-            self.log("Phase 1: Fetching unread emails")
-            raw_email = self.receive_email.fetch_unread_emails(max_results=1)
-
-            # Phase 2: Preprocess emails
-            self.log("Phase 2: Preprocessing emails")
-            cleaned_emails = self.preprocessor.process_email_response(raw_email)
-            self.log(f"Preprocessed {len(cleaned_emails.emails)} email(s)")
+            emails, history_id = self.fetch_emails(max_results)
             
-            if not cleaned_emails.emails:
+            if not emails:
                 self.log("No emails to process")
-                return
+                self.receive_email.save_history_id(history_id)
+                return 0
             
             # Phase 3: Process each email
-            self.log(f"Phase 3: Processing {len(cleaned_emails.emails)} email(s)")
+            self.log(f"Phase 3: Processing {len(emails)} email(s)")
             
-            for idx, email in enumerate(cleaned_emails.emails, 1):
+            for idx, email in enumerate(emails, 1):
                 self.log("-" * 60)
-                self.log(f"Processing email {idx}/{len(cleaned_emails.emails)}")
-                self.log(f"Email ID: {email.email_id}")
-                self.log(f"From: {email.from_name} <{email.from_email}>")
-                self.log(f"Subject: {email.subject}")
-                
-                try:
-                    # Phase 3a: Classification
-                    self.log("Phase 3a: Classifying email")
-                    classification = self.classifier(email)
-                    
-                    # Phase 3b: Route to appropriate agent
-                    self.log(f"Phase 3b: Routing to {classification.classification} agent")
-                    
-                    if classification.classification == "BASIC":
-                        self.log("Delegating to BasicAgent")
-                        self.basic_agent.run(email)
-                    elif classification.classification == "SCHEDULER":
-                        self.log("Delegating to SchedulerAgent")
-                        self.scheduler_agent.run(email)
-                    elif classification.classification == "PRIORITY":
-                        self.log("Delegating to PriorityAgent")
-                        self.priority_agent.run(email)
-                    elif classification.classification == "NON_BUSINESS":
-                        self.log("Delegating to NonBusinessAgent")
-                        self.nonbusiness_agent.run(email)
-                    else:
-                        raise ValueError(f"Invalid classification: {classification.classification}")
-                    
-                    # Phase 3c: Create and save result
-                    self.log("Phase 3c: Creating result record")
-                    result = Result(
-                        email_id=email.email_id,
-                        from_name=email.from_name,
-                        from_email=email.from_email,
-                        subject=email.subject,
-                        message=email.message,
-                        time=email.time,
-                        classification=classification.classification,
-                        confidence=classification.confidence,
-                        reasoning=classification.reasoning,
-                        success=True
-                    )
-                    
+                self.log(f"Processing email {idx}/{len(emails)}")
+                result = self.process_email(email)
+                if result is not None:
                     self.save_to_memory(result)
-                    self.log(f"✓ Email {email.email_id} processed successfully")
-
-                except Exception as e:
-                    self.log(f"✗ Pipeline failed for email_id={email.email_id}")
-                    self.log(f"Error details: {str(e)}")
-                    
-                    failed_result = Result(
-                        email_id=email.email_id,
-                        from_name=email.from_name,
-                        from_email=email.from_email,
-                        subject=email.subject,
-                        message=email.message,
-                        time=email.time,
-                        classification="ERROR",
-                        confidence=0.0,
-                        reasoning=str(e),
-                        success=False
-                    )
-                    
-                    self.save_to_memory(failed_result)
+
+            self.save_sync_state(emails, history_id)
             
             self.log("=" * 60)
             self.log("Executor run completed successfully")
             self.log("=" * 60)
+            self.flush_outbox()
+            self.log_cache_stats()
+            return len(emails)
             
         except Exception as e:
             self.log(f"✗ Executor run failed: {str(e)}")
             raise
 
+    def run_concurrent(self, max_results: int = 50, max_workers: int = MAX_WORKERS) -> int:
+        """
+        Process a batch of emails concurrently.
+
+        Emails move through classification and agent handling on a bounded
+        worker pool, with each stage capped by STAGE_LIMITS. Results are
+        written to memory.jsonl in fetch order, regardless of completion order.
+        Returns the number of emails fetched.
+        """
+        self.log("=" * 60)
+        self.log(f"Concurrent executor run started (workers: {max_workers})")
+        self.log("=" * 60)
+
+        try:
+            emails, history_id = self.fetch_emails(max_results)
+
+            if not emails:
+                self.log("No emails to process")
+                self.receive_email.save_history_id(history_id)
+                return 0
+
+            self.log(f"Phase 3: Processing {len(emails)} email(s) concurrently")
+
+            # Completed results wait here until every earlier email has been written
+            pending = {}
+            next_index = 0
+
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="executor") as pool:
+                futures = {pool.submit(self.process_email, email): idx for idx, email in enumerate(emails)}
+                for future in as_completed(futures):
+                    pending[futures[future]] = future.result()
+                    while next_index in pending:
+                        result = pending.pop(next_index)
+                        if result is not None:
+                            self.save_to_memory(result)
+                        next_index += 1
+
+            self.save_sync_state(emails, history_id)
+
+            self.log("=" * 60)
+            self.log(f"Concurrent executor run completed ({len(emails)} email(s))")
+            self.log("=" * 60)
+            self.flush_outbox()
+            self.log_cache_stats()
+            return len(emails)
+
+        except Exception as e:
+            self.log(f"✗ Executor run failed: {str(e)}")
+            raise
+
+    # A reply the outbox gave up on goes to the agent's manual-handling database,
+    # the same table the agent saves an email it could not answer to, with the
+    # unsent reply kept as a draft; the ledger records that the email needs review
+    def save_unsent_basic_reply(self, entry: dict):
+        from core import basic_agent_database
+        self.ledger.mark_needs_review(entry["email_id"], entry["last_error"])
+        basic_agent_database.create_db()
+        basic_agent_database.insert_email(CleanEmailData(**entry["email"]), crafted_email=entry["payload"].get("body"))
+
+    def save_unsent_scheduler_reply(self, entry: dict):
+        from core import scheduler_agent_database
+        self.ledger.mark_needs_review(entry["email_id"], entry["last_error"])
+        scheduler_agent_database.create_db()
+        scheduler_agent_database.insert_email(CleanEmailData(**entry["email"]), crafted_email=entry["payload"].get("body"))
+
+    def flush_outbox(self):
+        """Send queued replies now, unless the daemon's dispatcher is already sending them in the background."""
+        if self.dispatcher.running:
+            return
+        sent = self.dispatcher.drain()
+        if sent:
+            self.log(f"Outbox: {sent} send attempt(s), {self.outbox.counts()}")
+
+    def stop(self, signum=None, frame=None):
+        """Ask the daemon to stop after the emails currently in flight are done."""
+        if self.stop_event.is_set():
+            self.log("Second stop signal received, exiting immediately")
+            raise KeyboardInterrupt
+        self.log("Stop requested, draining in-flight emails")
+        self.stop_event.set()
+
+    def serve(self, min_interval: float = MIN_POLL_INTERVAL, max_interval: float = MAX_POLL_INTERVAL,
+              max_results: int = 50, max_workers: int = MAX_WORKERS):
+        """
+        Poll Gmail until stopped, keeping all agents and models loaded between polls.
+
+        A full batch polls again right away, a partial batch halves the wait and
+        an empty inbox doubles it, always within [min_interval, max_interval].
+        Queued replies are sent by the outbox dispatcher in the background, and
+        the local classifiers are refitted as the LLM labels more emails.
+        SIGINT/SIGTERM finish the current batch before returning.
+        """
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, self.stop)
+            signal.signal(signal.SIGTERM, self.stop)
+
+        self.stop_event.clear()
+        self.dispatcher.start()
+        interval = min_interval
+        self.log(f"Executor daemon started (poll interval {min_interval}-{max_interval}s)")
+
+        while not self.stop_event.is_set():
+            try:
+                fetched = self.run_concurrent(max_results=max_results, max_workers=max_workers)
+            except Exception as e:
+                self.log(f"Poll failed: {str(e)}")
+                fetched = 0
+            if fetched:
+                self.refresh_local_classifiers()
+
+            if fetched >= max_results:
+                interval = 0
+            elif fetched > 0:
+                interval = max(min_interval, interval / 2)
+            else:
+                interval = min(max_interval, max(interval, min_interval) * 2)
+
+            if interval:
+                self.log(f"Next poll in {interval:.0f}s")
+            self.stop_event.wait(interval)
+
+        self.dispatcher.stop()
+        self.flush_outbox()
+        self.log("Executor daemon stopped")
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classify and route unread emails")
+    parser.add_argument("--concurrent", action="store_true", help="process a batch of emails concurrently")
+    parser.add_argument("--daemon", action="store_true", help="keep running and poll Gmail on an adaptive schedule")
+    parser.add_argument("--max-results", type=int, default=None, help="maximum number of emails per fetch")
+    args = parser.parse_args()
+
     executor = ExecuterAgent()
-    executor.run()
-    print("FINISHED")
\ No newline at end of file
+    if args.daemon:
+        executor.serve(max_results=args.max_results or 50)
+    elif args.concurrent:
+        executor.run_concurrent(max_results=args.max_results or 50)
+    else:
+        executor.run(max_results=args.max_results or 1)
+    print("FINISHED")
@@ -0,0 +1,56 @@
+"""
+Reading the requested date and time out of a scheduling email.
+
+Run from the repository root:
+    python -m pytest Backend/tests
+"""
+import os
+import sys
+from datetime import date, datetime, time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from agents.scheduler_agent.availability import check_request, requested_date, requested_time
+
+# A Saturday
+TODAY = date(2026, 10, 17)
+
+
+def test_requested_date_formats():
+    assert requested_date("Could we meet on 2026-10-20?", TODAY) == date(2026, 10, 20)
+    assert requested_date("How about October 22nd?", TODAY) == date(2026, 10, 22)
+    assert requested_date("Is the 5th of Nov. free?", TODAY) == date(2026, 11, 5)
+    assert requested_date("Are you free tomorrow?", TODAY) == date(2026, 10, 18)
+    assert requested_date("Next Monday works for me", TODAY) == date(2026, 10, 19)
+    # A date already past this year means next year
+    assert requested_date("Can we talk on January 3?", TODAY) == date(2027, 1, 3)
+
+
+def test_may_the_verb_is_not_a_month():
+    assert requested_date("I may 2 things to discuss", TODAY) is None
+    assert check_request("I may 2 things to discuss", [], TODAY) is None
+    assert requested_date("Could we meet on May 2?", TODAY) == date(2027, 5, 2)
+
+
+def test_requested_time_formats():
+    assert requested_time("at 9am please") == time(9, 0)
+    assert requested_time("around 9:30 p.m.") == time(21, 30)
+    assert requested_time("at 21:15") == time(21, 15)
+    assert requested_time("any time works") is None
+
+
+def test_check_request():
+    busy = [(datetime(2026, 10, 20, 8, 30), datetime(2026, 10, 20, 9, 0))]
+
+    assert check_request("Tuesday at 9am?", busy, TODAY) == "Requested Tuesday, October 20, 2026 at 09:00 AM: unavailable."
+    assert check_request("Tuesday at 10pm?", busy, TODAY) == (
+        "Requested Tuesday, October 20, 2026 at 10:00 PM: available as 09:00 PM - 11:00 PM."
+    )
+    assert check_request("Tuesday at 3pm?", busy, TODAY) == (
+        "Requested Tuesday, October 20, 2026 at 03:00 PM: outside the appointment windows."
+    )
+    assert check_request("Could we meet on 2026-12-25?", busy, TODAY, days=30) == (
+        "Requested Friday, December 25, 2026: beyond the booking horizon of 30 days."
+    )
+    assert check_request("Thanks for the update", busy, TODAY) is None
@@ -0,0 +1,54 @@
+"""
+Parity of the ONNX int8 embedder with the torch one on knowledge-base text.
+
+Skipped unless onnxruntime, tokenizers and sentence-transformers are
+installed and the ONNX model has been exported:
+    python -m agents.basic_agent.rag.embedder export
+
+Run from the repository root:
+    python -m pytest Backend/tests
+"""
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("tokenizers")
+pytest.importorskip("sentence_transformers")
+
+from agents.basic_agent.rag.chunker import chunk_text
+from agents.basic_agent.rag.embedder import ONNX_MODEL_DIR, ONNX_MODEL_FILE, OnnxEmbedder, TorchEmbedder
+
+KNOWLEDGE_BASE_DIR = os.path.join(BACKEND_DIR, "agents", "basic_agent", "knowledge_base")
+DOCUMENTS = ["policies/pricing.md", "policies/availability.md", "offerings/mentorships.md"]
+CHUNKS_PER_DOCUMENT = 3
+# Same floor as benchmarks/embedding_parity.py
+MIN_COSINE = 0.98
+
+if not os.path.exists(os.path.join(ONNX_MODEL_DIR, ONNX_MODEL_FILE)):
+    pytest.skip(f"ONNX model not exported to {ONNX_MODEL_DIR}", allow_module_level=True)
+
+
+def knowledge_base_texts() -> list[str]:
+    texts = []
+    for document in DOCUMENTS:
+        with open(os.path.join(KNOWLEDGE_BASE_DIR, document), "r", encoding="utf-8") as f:
+            texts.extend(text for _, text in chunk_text(f.read())[:CHUNKS_PER_DOCUMENT])
+    return texts
+
+
+def test_onnx_embeddings_match_torch():
+    texts = knowledge_base_texts()
+
+    onnx_vectors = np.asarray(OnnxEmbedder().encode(texts), dtype=np.float32)
+    torch_vectors = np.asarray(TorchEmbedder().encode(texts), dtype=np.float32)
+
+    # Both backends L2-normalize, so the row-wise dot product is the cosine similarity
+    cosine = np.sum(onnx_vectors * torch_vectors, axis=1)
+    assert onnx_vectors.shape == torch_vectors.shape
+    assert cosine.min() >= MIN_COSINE, f"lowest cosine {cosine.min():.4f} over {len(texts)} texts"
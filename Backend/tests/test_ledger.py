@@ -0,0 +1,64 @@
+"""
+Retry bookkeeping in ProcessedLedger.
+
+Run from the repository root:
+    python -m pytest Backend/tests
+"""
+import os
+import sys
+from types import SimpleNamespace
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from core.ledger import FAILED, MAX_ATTEMPTS, ProcessedLedger
+
+
+def make_email(email_id: str):
+    return SimpleNamespace(email_id=email_id, from_email="sarah@example.com", subject="Hello", message="Hi there")
+
+
+def test_failed_email_is_retried_until_out_of_attempts(tmp_path):
+    ledger = ProcessedLedger(db_path=str(tmp_path / "ledger.db"))
+    email = make_email("a")
+
+    for _ in range(MAX_ATTEMPTS):
+        assert ledger.settled(["a"]) == set()
+        assert ledger.claim(email)
+        ledger.mark_failed("a", "LLM timeout")
+
+    assert ledger.settled(["a"]) == {"a"}
+    assert not ledger.claim(email)
+
+
+def test_interrupted_email_is_not_reclaimed_forever(tmp_path):
+    ledger = ProcessedLedger(db_path=str(tmp_path / "ledger.db"))
+    email = make_email("a")
+
+    for _ in range(MAX_ATTEMPTS):
+        assert ledger.claim(email)
+        # The process dies while the agent handles the email
+        ledger.mark_handling("a")
+
+    assert not ledger.claim(email)
+    assert ledger.get("a")["status"] == FAILED
+    assert ledger.settled(["a", "b"]) == {"a"}
+
+
+def test_done_email_is_settled(tmp_path):
+    ledger = ProcessedLedger(db_path=str(tmp_path / "ledger.db"))
+    ledger.claim(make_email("a"))
+    ledger.mark_done("a")
+
+    assert ledger.settled(["a"]) == {"a"}
+    assert not ledger.claim(make_email("a"))
+
+
+def test_email_with_unsent_reply_waits_for_review(tmp_path):
+    ledger = ProcessedLedger(db_path=str(tmp_path / "ledger.db"))
+    ledger.claim(make_email("a"))
+    ledger.mark_done("a")
+    ledger.mark_needs_review("a", "HTTP 502")
+
+    assert ledger.settled(["a"]) == {"a"}
+    assert not ledger.claim(make_email("a"))
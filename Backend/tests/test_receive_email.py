@@ -0,0 +1,186 @@
+"""
+Batch fetching in ReceiveEmail against an in-memory Gmail service.
+
+Run from the repository root:
+    python -m pytest Backend/tests
+"""
+import base64
+import os
+import sys
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from core.receive_email import ReceiveEmail
+
+
+def make_message(message_id: str) -> dict:
+    body = base64.urlsafe_b64encode(f"Body of {message_id}".encode("utf-8")).decode("ascii")
+    return {
+        "id": message_id,
+        "internalDate": "1767225600000",
+        "payload": {
+            "headers": [
+                {"name": "Subject", "value": f"Subject {message_id}"},
+                {"name": "From", "value": "Sarah Johnson <sarah@example.com>"},
+                {"name": "Date", "value": "Thu, 1 Jan 2026 00:00:00 +0000"},
+            ],
+            "body": {"data": body},
+        },
+    }
+
+
+def http_error(status: int) -> HttpError:
+    return HttpError(httplib2.Response({"status": status}), b"")
+
+
+class FakeRequest:
+    def __init__(self, service, message_id):
+        self.service = service
+        self.message_id = message_id
+
+    def execute(self):
+        self.service.single_gets.append(self.message_id)
+        result = self.service.stored[self.message_id]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class FakeBatch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.request_ids = []
+
+    def add(self, request, request_id):
+        self.request_ids.append(request_id)
+
+    def execute(self):
+        for request_id in self.request_ids:
+            result = self.service.batch_results.get(request_id, self.service.stored[request_id])
+            if isinstance(result, Exception):
+                self.callback(request_id, None, result)
+            else:
+                self.callback(request_id, result, None)
+
+
+class FakeResult:
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+
+class FakeGmail:
+    """
+    Just enough of the Gmail service for the message fetch paths.
+
+    stored holds what a single messages().get() returns (or raises);
+    batch_results overrides what the same get returns inside a batch.
+    messages().list() pages through stored in pages of page_size.
+    """
+
+    def __init__(self, stored: dict, batch_results: dict, page_size: int = 2):
+        self.stored = stored
+        self.batch_results = batch_results
+        self.page_size = page_size
+        self.single_gets = []
+
+    def getProfile(self, userId):
+        return FakeResult({"historyId": "42"})
+
+    def _page(self, start: int):
+        ids = list(self.stored)[start:start + self.page_size]
+        response = {"messages": [{"id": message_id} for message_id in ids]}
+        if start + self.page_size < len(self.stored):
+            response["nextPageToken"] = str(start + self.page_size)
+        return FakeResult(response)
+
+    def list(self, userId, maxResults, labelIds):
+        return self._page(0)
+
+    def list_next(self, request, response):
+        token = response.get("nextPageToken")
+        return self._page(int(token)) if token else None
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def get(self, userId, id):
+        return FakeRequest(self, id)
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+
+
+def make_receiver(stored: dict, batch_results: dict, tmp_path) -> ReceiveEmail:
+    service = FakeGmail(stored, batch_results)
+    return ReceiveEmail(service=service, sync_state_path=str(tmp_path / "sync_state.json"))
+
+
+def test_partial_batch_failure_is_retried_individually(tmp_path):
+    ids = ["a", "b", "c", "d"]
+    messages = {message_id: make_message(message_id) for message_id in ids}
+    batch_results = {
+        # Unparseable response inside the batch, fine when fetched on its own
+        "b": {"id": "b", "payload": {}},
+        # Transient error inside the batch
+        "c": http_error(500),
+    }
+    receiver = make_receiver(messages, batch_results, tmp_path)
+
+    emails = receiver._process_messages_batch(ids)
+
+    assert [email.id for email in emails] == ids
+    assert emails[1].subject == "Subject b"
+    assert sorted(receiver.service.single_gets) == ["b", "c"]
+
+
+def test_deleted_messages_are_skipped(tmp_path):
+    ids = ["a", "b", "c"]
+    messages = {message_id: make_message(message_id) for message_id in ids}
+    messages["c"] = http_error(404)
+    receiver = make_receiver(messages, {"b": http_error(404)}, tmp_path)
+
+    assert [email.id for email in receiver._fetch_messages([{"id": i} for i in ids], use_batch=True)] == ["a"]
+    assert [email.id for email in receiver._fetch_messages([{"id": i} for i in ids], use_batch=False)] == ["a", "b"]
+
+
+def test_full_sync_lists_every_page(tmp_path):
+    ids = ["a", "b", "c", "d", "e"]
+    receiver = make_receiver({message_id: make_message(message_id) for message_id in ids}, {}, tmp_path)
+
+    response = receiver.fetch_new_emails(max_results=10)
+
+    assert response.success
+    assert [email.id for email in response.emails] == ids
+    assert response.history_id == "42"
+
+
+def test_backlog_over_max_results_is_fetched_over_several_runs(tmp_path):
+    ids = ["a", "b", "c", "d", "e"]
+    receiver = make_receiver({message_id: make_message(message_id) for message_id in ids}, {}, tmp_path)
+    handled = set()
+
+    def exclude(message_ids):
+        return handled.intersection(message_ids)
+
+    batches = []
+    while True:
+        response = receiver.fetch_new_emails(max_results=2, exclude=exclude)
+        assert response.success
+        batches.append([email.id for email in response.emails])
+        handled.update(batches[-1])
+        if response.history_id is not None:
+            break
+
+    assert batches == [["a", "b"], ["c", "d"], ["e"]]
+    assert response.history_id == "42"
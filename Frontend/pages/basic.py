@@ -226,6 +226,14 @@ for i, email in enumerate(emails):
             st.text_input("Email ID", value=email.get("email_id"), disabled=True)
             st.text_area("Message", value=email.get("message"), height=150, disabled=True)
 
+            if email.get("crafted_email"):
+                st.text_area(
+                    "Auto-Generated Response (Read Only)",
+                    value=email.get("crafted_email"),
+                    height=150,
+                    disabled=True
+                )
+
             crafted_message = st.text_area(
                 "Response (Editable)",
                 placeholder="Write your crafted response here...",